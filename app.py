@@ -1,39 +1,129 @@
-from flask import Flask, render_template, request, redirect, url_for
-from services.all_key_service import AllKeyService
-from services.watchlist_service import WatchlistService
-from services.database_service import DatabaseService
-from models.database import db
-from config import ADDRESSES_PER_PAGE, BITCOIN_MAX_NUMBER, FLASK_HOST, FLASK_PORT, FLASK_DEBUG, MAX_SEARCH_PAGES, HEX_KEY_START, HEX_KEY_END, SQLALCHEMY_DATABASE_URI, SQLALCHEMY_ENGINE_OPTIONS
+import gzip
+import threading
+import time
+from flask import Flask, render_template, request, redirect, url_for, jsonify
+from services.page_range import page_first_key, key_page, range_max_page
+from services.adaptive_sizing_service import AdaptiveSizingService
+from models.work_chunk import WorkChunk
+from config import ADDRESSES_PER_PAGE, FLASK_HOST, FLASK_PORT, FLASK_DEBUG, MAX_SEARCH_PAGES, HEX_KEY_START, HEX_KEY_END, HOME_VIEW_MODE, ADAPTIVE_PAGE_SIZING, TARGET_LATENCY_SECONDS, ADAPTIVE_INITIAL_KEYS_PER_SECOND, ADAPTIVE_MAX_PAGES_PER_CHUNK, ADAPTIVE_MIN_KEYS_PER_CHUNK, MAX_SEARCH_JOB_PAGES, SEARCH_JOB_WORKERS, SEARCH_JOB_SLICE_PAGES, SEARCH_JOB_REQUEST_SLICE_PAGES, SEARCH_JOB_STALE_SECONDS, NEAR_MISS_TRACKING, NEAR_MISS_MIN_BITS, FAST_START, CREATE_TABLES_ON_FIRST_USE, SEARCH_JOBS_ENABLED
 
 app = Flask(__name__)
 
-# Configure SQLAlchemy
-app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = SQLALCHEMY_ENGINE_OPTIONS
+# Initialize services
+adaptive_sizing_service = AdaptiveSizingService(
+    limit_per_page=ADDRESSES_PER_PAGE,
+    target_seconds=TARGET_LATENCY_SECONDS,
+    initial_keys_per_second=ADAPTIVE_INITIAL_KEYS_PER_SECOND,
+    max_pages_per_chunk=ADAPTIVE_MAX_PAGES_PER_CHUNK,
+    min_keys_per_chunk=ADAPTIVE_MIN_KEYS_PER_CHUNK
+)
 
-# Initialize database with app context
-db.init_app(app)
+# The database and the remaining services are created on first use: SQLAlchemy, ecdsa/base58 (and
+# NumPy) dominate import time, so with FAST_START a cold instance only loads what its route needs
+_services = {}
+_services_lock = threading.RLock()
 
-# Initialize services
-all_key_service = AllKeyService()
-watchlist_service = WatchlistService()
+def _get_service(name, factory):
+    """Return the named service, creating it with `factory` on first use"""
+    service = _services.get(name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(name)
+            if service is None:
+                service = factory()
+                _services[name] = service
+    return service
 
-# Create database tables on first request (with error handling)
-_db_initialized = False
+def get_db():
+    """Return the database, importing SQLAlchemy and the models on first use
+    
+    Missing tables are created then, once per process, unless the schema is set up
+    ahead of time with `flask --app app init-db` (CREATE_TABLES_ON_FIRST_USE).
+    """
+    def create():
+        from models.database import db
+        if CREATE_TABLES_ON_FIRST_USE:
+            create_tables()
+        return db
+    return _get_service('db', create)
 
-@app.before_request
 def create_tables():
-    global _db_initialized
-    if not _db_initialized:
-        try:
-            db.create_all()
-            _db_initialized = True
-            print("✓ Database tables created/verified")
-        except Exception as e:
-            # Log error but continue - app will work with limited functionality
-            print(f"⚠ Database warning (app will continue): {type(e).__name__}: {str(e)[:100]}")
-            _db_initialized = True  # Only try once per deployment
+    """Create missing database tables (and the SQLite data directory)"""
+    from services.database_service import DatabaseService
+    try:
+        DatabaseService.init_db()
+        print("✓ Database tables created/verified")
+    except Exception as e:
+        # Log error but continue - app will work with limited functionality
+        print(f"⚠ Database warning (app will continue): {type(e).__name__}: {str(e)[:100]}")
+
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    """Return the request's (or worker's) database connection to the pool"""
+    database = _services.get('db')
+    if database is not None:
+        database.session.remove()
+
+def get_database_service():
+    """Return DatabaseService once the database is set up"""
+    get_db()
+    from services.database_service import DatabaseService
+    return DatabaseService
+
+def get_analytics_service():
+    """Return AnalyticsService once the database is set up"""
+    get_db()
+    from services.analytics_service import AnalyticsService
+    return AnalyticsService
+
+def get_all_key_service():
+    def create():
+        from services.all_key_service import AllKeyService
+        return AllKeyService()
+    return _get_service('all_key', create)
+
+def get_watchlist_service():
+    # The watchlist file is read when the service is created, i.e. by the first route that needs it
+    def create():
+        from services.watchlist_service import WatchlistService
+        return WatchlistService()
+    return _get_service('watchlist', create)
+
+def get_near_miss_service():
+    def create():
+        from services.near_miss_service import NearMissService
+        return NearMissService(get_watchlist_service(), min_bits=NEAR_MISS_MIN_BITS)
+    get_db()
+    return _get_service('near_miss', create)
+
+def get_search_job_service():
+    def create():
+        from services.search_job_service import SearchJobService
+        return SearchJobService(
+            app,
+            get_all_key_service(),
+            limit_per_page=ADDRESSES_PER_PAGE,
+            max_workers=SEARCH_JOB_WORKERS,
+            slice_pages=SEARCH_JOB_SLICE_PAGES,
+            request_slice_pages=SEARCH_JOB_REQUEST_SLICE_PAGES,
+            stale_seconds=SEARCH_JOB_STALE_SECONDS
+        )
+    get_db()
+    return _get_service('search_job', create)
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the database tables and apply one-time data migrations"""
+    get_db()
+    create_tables()
+    # Data migrations can touch every row of a table, so they never run inside a request
+    get_database_service().migrate_range_relative_pages(ADDRESSES_PER_PAGE)
+
+if not FAST_START:
+    # Load the database, the key generation stack and the watchlist up front
+    get_db()
+    get_all_key_service()
+    get_watchlist_service()
 
 @app.route('/')
 def home():
@@ -41,21 +131,71 @@ def home():
 
 @app.route('/home')
 def home_page():
-    try:
-        page = int(float(request.args.get('page', 1)))
-    except (ValueError, TypeError):
-        page = 1
-    
-    # Ensure page is at least 1
-    page = max(1, page)
+    # Adaptive sizing is fed the time of the whole request, rendering and database work included
+    request_started = time.perf_counter()
+    page = parse_page_number(request.args.get('page', 1))
     
+    # Pages are counted from HEX_KEY_START, so the last page is the end of the configured range
     limit_per_page = ADDRESSES_PER_PAGE
+    max_page = range_max_page(limit_per_page)
+    
+    # Keep page within 1..max_page
+    page = min(max(1, page), max_page)
+    
+    # 'table' renders every row with Jinja, 'virtual' ships one JSON payload rendered client-side
+    view = request.args.get('view')
+    view_mode = view if view in ('table', 'virtual') else HOME_VIEW_MODE
+    
+    all_key_service = get_all_key_service()
+    watchlist_service = get_watchlist_service()
+    database_service = get_database_service()
+    analytics_service = get_analytics_service()
+    
+    page_percentage = calculate_page_percentage(page, max_page)
+    coverage_percentage = calculate_coverage_percentage(analytics_service.get_covered_pages(), max_page)
+    
+    # Size the work for this request; without adaptive sizing a request is exactly one page
+    if ADAPTIVE_PAGE_SIZING:
+        chunk = adaptive_sizing_service.chunk_for(page, request.args.get('part'), request.args.get('parts'), max_page)
+        if chunk.parts > 1 and request.args.get('part') is None:
+            # Finish an interrupted split of this page before starting a new one
+            split = database_service.get_missing_page_parts(page)
+            if split and split[1]:
+                chunk = WorkChunk(page=page, part=split[1][0], parts=split[0])
+    else:
+        chunk = WorkChunk(page=page)
+    
+    # Several pages in one response are always rendered client-side: 16 pages as a table are ~250k rows
+    if chunk.span > 1:
+        view_mode = 'virtual'
     
     # Get Bitcoin keys and addresses
-    items = all_key_service.get_data(page, limit_per_page)
+    offset, count = chunk.key_offsets(limit_per_page)
+    started = time.perf_counter()
+    items = all_key_service.get_range(page_first_key(page, limit_per_page) + offset, count)
+    elapsed = time.perf_counter() - started
+    
+    # Record visited pages once all of their keys have been generated; they are committed together
+    # with the throughput sample below, which keeps the coverage counter exact. The parts of a split
+    # page are tracked here rather than trusted from the request arguments.
+    completed_pages = range(chunk.page, chunk.last_page + 1)
+    missing_parts = None
+    if chunk.parts > 1:
+        missing_parts = database_service.add_visited_page_part(chunk.page, chunk.part, chunk.parts)
+        if missing_parts != []:
+            completed_pages = []
+    new_pages = 0
+    for visited_page in completed_pages:
+        if database_service.add_visited_page(visited_page, commit=False):
+            new_pages += 1
+    
+    # Feed the throughput history and the precomputed coverage counter
+    analytics_service.record_throughput(len(items), elapsed, new_pages, max_page)
     
-    # Record visited page to database
-    DatabaseService.add_visited_page(page)
+    # Continue a split page with its next missing part before moving on
+    next_url = None
+    if missing_parts:
+        next_url = url_for('home_page', page=page, part=missing_parts[0], parts=chunk.parts, view=view)
     
     # Check watchlist for matches
     all_addresses = []
@@ -69,56 +209,105 @@ def home_page():
         item.is_watchlist_match_compressed = item.address_compressed in watchlist_matches
         # Record matched addresses to database
         if item.is_watchlist_match_compressed:
-            DatabaseService.add_matched_address(
-                page,
+            database_service.add_matched_address(
+                key_page(int(item.hex_private_key, 16), limit_per_page),
                 item.address_compressed,
                 item.hex_private_key
             )
     
-    # Calculate pagination based on full Bitcoin range for proper page calculations
-    max_page = BITCOIN_MAX_NUMBER // limit_per_page
-    page_percentage = calculate_page_percentage(page, max_page)
+    # Record the closest hash160 prefix matches per target (runs after exact matching)
+    if NEAR_MISS_TRACKING and not watchlist_service.is_empty():
+        get_near_miss_service().record(items, lambda item: key_page(int(item.hex_private_key, 16), limit_per_page))
     
     # Count matching addresses on this page
     matches_count = len(watchlist_matches)
     
-    return render_template('home.html', 
+    if view_mode == 'virtual':
+        # Keys on a page are consecutive, so only the first key is sent; the rest are derived by row index
+        payload = {
+            'first_key': items[0].hex_private_key if items else '',
+            'addresses': all_addresses,
+            'matches': [i for i, item in enumerate(items) if item.is_watchlist_match_compressed]
+        }
+        response = gzip_response(app.make_response(render_template('home_virtual.html',
+                                                      payload=payload,
+                                                      page=page,
+                                                      max_page=max_page,
+                                                      page_percentage=page_percentage,
+                                                      coverage_percentage=coverage_percentage,
+                                                      view=view,
+                                                      chunk=chunk,
+                                                      last_page=chunk.last_page,
+                                                      next_url=next_url,
+                                                      watchlist_matches=matches_count,
+                                                      is_watchlist_empty=watchlist_service.is_empty())))
+    else:
+        response = render_template('home.html', 
                          items=items, 
                          page=page, 
                          max_page=max_page,
                          page_percentage=page_percentage,
+                         coverage_percentage=coverage_percentage,
                          table_header_columns=[
                              'privateKey', 'compressed'
                          ],
+                         view=view,
+                         chunk=chunk,
+                         last_page=chunk.last_page,
+                         next_url=next_url,
                          watchlist_matches=matches_count,
                          is_watchlist_empty=watchlist_service.is_empty())
+    
+    if ADAPTIVE_PAGE_SIZING:
+        adaptive_sizing_service.record(len(items), time.perf_counter() - request_started)
+    return response
+
+def gzip_response(response):
+    """Gzip-compress a response body when the client accepts it"""
+    if 'gzip' not in request.headers.get('Accept-Encoding', '').lower():
+        return response
+    
+    response.set_data(gzip.compress(response.get_data(), compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@app.route('/analytics')
+def analytics():
+    """Coverage of the configured range, current throughput and projected time to exhaust it"""
+    summary = get_analytics_service().get_summary(range_max_page(ADDRESSES_PER_PAGE), ADDRESSES_PER_PAGE)
+    if request.args.get('format') == 'json':
+        return jsonify(summary)
+    return render_template('analytics.html', summary=summary, no_auto_click=True)
 
 @app.route('/about')
 def about():
-    return render_template('about.html')
+    return render_template('about.html', max_page=range_max_page(ADDRESSES_PER_PAGE))
 
 @app.route('/random')
 def random_page():
     """Redirect to a random page within the configured hex key range"""
     import random
-    import math
     
-    limit_per_page = ADDRESSES_PER_PAGE
-    
-    # Calculate the page range that contains the configured hex keys
-    start_page = HEX_KEY_START // limit_per_page
-    end_page = HEX_KEY_END // limit_per_page
-    
-    # Pick a random page within the valid range
-    random_page_num = random.randint(start_page, end_page)
+    # Pages are counted from HEX_KEY_START, so every page from 1 to the last one holds range keys
+    random_page_num = random.randint(1, range_max_page(ADDRESSES_PER_PAGE))
     
-    return redirect(url_for('home_page', page=random_page_num))
+    # Keep the requested view mode across auto-navigation cycles
+    return redirect(url_for('home_page', page=random_page_num, view=request.args.get('view')))
 
-@app.route('/search')
+@app.route('/search', methods=['GET', 'POST'])
 def search():
-    """Search for a specific Bitcoin address and find which page it's on"""
-    address = request.args.get('address', '').strip()
-    start_page = request.args.get('start_page', '1').strip()
+    """Search for a specific Bitcoin address, as a background job when the database is shared"""
+    # GET only pre-fills the form, so links, crawlers and prefetchers never start a search
+    if request.method == 'GET':
+        return render_template('search.html',
+                             address=request.args.get('address', '').strip(),
+                             start_page=request.args.get('start_page', '1').strip(),
+                             pages=request.args.get('pages', str(MAX_SEARCH_PAGES)).strip())
+    
+    address = request.form.get('address', '').strip()
+    start_page = request.form.get('start_page', '1').strip()
+    pages = request.form.get('pages', str(MAX_SEARCH_PAGES)).strip()
     
     if not address:
         return render_template('search.html', error="Please enter an address to search")
@@ -127,7 +316,7 @@ def search():
     if not (address.startswith('1') or address.startswith('3') or address.startswith('bc1')):
         return render_template('search.html', error="Invalid Bitcoin address format")
     
-    # Validate and parse starting page
+    # Validate and parse starting page and search window
     try:
         start_page = int(start_page)
         if start_page < 1:
@@ -141,32 +330,49 @@ def search():
                              start_page=start_page,
                              error="Invalid starting page number")
     
-    # Search for the address
-    result = find_address_page(address, start_page)
+    max_pages = MAX_SEARCH_JOB_PAGES if SEARCH_JOBS_ENABLED else MAX_SEARCH_PAGES
+    try:
+        pages = int(pages)
+        if pages < 1 or pages > max_pages:
+            raise ValueError
+    except ValueError:
+        return render_template('search.html', 
+                             address=address, 
+                             start_page=start_page,
+                             error=f"Number of pages must be between 1 and {max_pages}")
     
-    if result:
+    if not SEARCH_JOBS_ENABLED:
+        # Without a shared database a job's status could be polled on another instance; search in the request
+        result = find_address_page(address, start_page, pages)
+        if result:
+            return render_template('search.html', 
+                                 address=address, 
+                                 start_page=start_page,
+                                 pages=pages,
+                                 page=result['page'], 
+                                 position=result['position'],
+                                 private_key=result['private_key'],
+                                 is_compressed=result['is_compressed'])
         return render_template('search.html', 
                              address=address, 
                              start_page=start_page,
-                             page=result['page'], 
-                             position=result['position'],
-                             private_key=result['private_key'],
-                             is_compressed=result['is_compressed'])
-    else:
+                             pages=pages,
+                             error=f"Address not found in pages {start_page} to {start_page + pages - 1}")
+    
+    # Run the search in the background and show its progress page
+    job_id = get_search_job_service().submit(address, start_page, pages)
+    if job_id is None:
         return render_template('search.html', 
                              address=address, 
                              start_page=start_page,
-                             error=f"Address not found in pages {start_page} to {start_page + MAX_SEARCH_PAGES - 1}")
+                             pages=pages,
+                             error="Could not start the search, please try again")
+    return redirect(url_for('search_job', job_id=job_id))
 
-def find_address_page(target_address, start_page=1):
-    """Find which page contains a specific Bitcoin address"""
-    # We need to search through the generated addresses
-    # This is computationally expensive, so we'll use a smart search approach
-    
-    # Search through MAX_SEARCH_PAGES starting from the specified start_page
-    end_page = start_page + MAX_SEARCH_PAGES - 1
-    
-    for page in range(start_page, end_page + 1):
+def find_address_page(target_address, start_page, pages):
+    """Find which page contains a specific Bitcoin address, searching `pages` pages from start_page"""
+    all_key_service = get_all_key_service()
+    for page in range(start_page, start_page + pages):
         items = all_key_service.get_data(page, ADDRESSES_PER_PAGE)
         
         for i, item in enumerate(items):
@@ -181,6 +387,33 @@ def find_address_page(target_address, start_page=1):
     # If not found in the search range, return None
     return None
 
+@app.route('/search/<job_id>')
+def search_job(job_id):
+    """Report progress and result of a search job (?format=json for polling clients)"""
+    job = get_search_job_service().get_job(job_id)
+    if job is None:
+        return render_template('search.html', error="Search job not found"), 404
+    
+    if request.args.get('format') == 'json':
+        return jsonify(job)
+    
+    return render_template('search.html', 
+                         job=job,
+                         address=job['address'], 
+                         start_page=job['start_page'],
+                         pages=job['total_pages'],
+                         page=job['page'], 
+                         position=job['position'],
+                         private_key=job['private_key'],
+                         is_compressed=True,
+                         no_auto_click=True)
+
+@app.route('/search/<job_id>/cancel', methods=['POST'])
+def cancel_search_job(job_id):
+    """Cancel a running search job"""
+    get_search_job_service().cancel(job_id)
+    return redirect(url_for('search_job', job_id=job_id))
+
 def truncate_text(text, start_chars=4, end_chars=3):
     """Truncate text to show only start and end characters with dots in between"""
     if not text or len(text) <= start_chars + end_chars:
@@ -236,41 +469,70 @@ def format_scientific_notation(number):
         return "2.8×10²³"
 
 def calculate_page_percentage(current_page, max_page):
-    """Calculate the percentage of current page position within total pages using logarithmic scale
+    """Calculate the position of the current page within the configured range as a percentage
     
-    This is essential for Bitcoin key space where max_page is ~10^76.
-    Logarithmic scaling makes the percentage meaningful (order of magnitude).
+    Pages are counted from HEX_KEY_START, so page 1 is 0% and max_page is 100%.
     """
-    import math
-    
-    if max_page <= 0 or current_page <= 0:
+    if max_page <= 1 or current_page <= 0:
         return 0.00
     
-    # Use logarithmic scale to handle massive page numbers
-    # Maps: page 1 -> 0%, page at log(max_page) -> ~50%, page at max_page -> 100%
-    log_current = math.log10(current_page)
-    log_max = math.log10(max_page)
-    
-    if log_max <= 0:
-        return 0.00
-    
-    percentage = (log_current / log_max) * 100
+    percentage = (current_page - 1) / (max_page - 1) * 100
     # Clamp to 0-100 range
     percentage = min(100.00, max(0.00, percentage))
     return round(percentage, 2)
 
+def calculate_coverage_percentage(visited_pages, max_page):
+    """Calculate the percentage of the configured range that has been visited"""
+    if max_page <= 0:
+        return 0.0
+    return min(100.0, visited_pages / max_page * 100)
+
+def format_duration(seconds):
+    """Format a duration in seconds using the largest sensible unit"""
+    if seconds is None:
+        return "∞"
+    units = [('years', 365 * 24 * 3600), ('days', 24 * 3600), ('hours', 3600), ('minutes', 60)]
+    for name, size in units:
+        if seconds >= size:
+            value = seconds / size
+            if value >= 1000:
+                return f"{format_scientific_notation(int(value))} {name}"
+            return f"{value:.1f} {name}"
+    return f"{seconds:.0f} seconds"
+
+def format_percentage(percentage):
+    """Format a percentage with 3 significant digits, so tiny coverage values stay visible"""
+    if percentage == 0:
+        return "0"
+    return f"{percentage:.3g}"
+
+def parse_page_number(value, default=1):
+    """Parse a page number from a request argument
+    
+    int() is tried first because float() rounds page numbers above 2**53.
+    """
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        pass
+    try:
+        return int(float(value))
+    except (ValueError, TypeError, OverflowError):
+        return default
+
 @app.route('/watchlist')
 def watchlist():
     """View and manage watchlist"""
-    watchlist_addresses = sorted(watchlist_service.get_watchlist())
-    return render_template('watchlist.html', addresses=watchlist_addresses)
+    watchlist_addresses = sorted(get_watchlist_service().get_watchlist())
+    near_misses = get_database_service().get_near_misses() if NEAR_MISS_TRACKING else []
+    return render_template('watchlist.html', addresses=watchlist_addresses, near_misses=near_misses)
 
 @app.route('/watchlist/add', methods=['POST'])
 def add_to_watchlist():
     """Add address to watchlist"""
     address = request.form.get('address', '').strip()
     if address:
-        watchlist_service.add_address(address)
+        get_watchlist_service().add_address(address)
     return redirect(url_for('watchlist'))
 
 @app.route('/watchlist/remove', methods=['POST'])
@@ -278,7 +540,7 @@ def remove_from_watchlist():
     """Remove address from watchlist"""
     address = request.form.get('address', '').strip()
     if address:
-        watchlist_service.remove_address(address)
+        get_watchlist_service().remove_address(address)
     return redirect(url_for('watchlist'))
 
 # Make functions available in templates
@@ -287,7 +549,11 @@ app.jinja_env.globals.update(
     format_page_number=format_page_number,
     format_scientific_notation=format_scientific_notation,
     calculate_page_percentage=calculate_page_percentage,
+    format_percentage=format_percentage,
+    format_duration=format_duration,
     MAX_SEARCH_PAGES=MAX_SEARCH_PAGES,
+    MAX_SEARCH_JOB_PAGES=MAX_SEARCH_JOB_PAGES,
+    SEARCH_JOBS_ENABLED=SEARCH_JOBS_ENABLED,
     ADDRESSES_PER_PAGE=ADDRESSES_PER_PAGE,
     HEX_KEY_START=HEX_KEY_START,
     HEX_KEY_END=HEX_KEY_END
@@ -2,15 +2,76 @@
 Configuration settings for the All Bitcoin Private Key application
 """
 
-# Number of addresses to display per page
-ADDRESSES_PER_PAGE = 15750
+import os
+
+# Number of addresses to display per page (ADDRESSES_PER_PAGE env var overrides, e.g. for load testing)
+ADDRESSES_PER_PAGE = int(os.environ.get('ADDRESSES_PER_PAGE', 15750))
 
 # Hex key range configuration
 HEX_KEY_START = 0x400000000000000000  # Starting hex key range
 HEX_KEY_END = 0x7fffffffffffffffff    # Ending hex key range
 
+# Results view mode for /home (can be overridden per request with ?view=table or ?view=virtual)
+# 'table'   - every row is rendered server-side as HTML
+# 'virtual' - the page ships one compact JSON payload and only visible rows are rendered in the browser
+HOME_VIEW_MODE = 'table'
+
+# Adaptive page sizing
+# When enabled, each request measures its keys/sec and sizes its work to TARGET_LATENCY_SECONDS:
+# a fast instance generates several consecutive pages per request, a slow or cold one splits
+# a page into parts. Page numbers stay on the ADDRESSES_PER_PAGE grid; a split page counts as visited
+# once the server has generated all of its parts. Multi-page chunks always use the virtual view.
+ADAPTIVE_PAGE_SIZING = False
+TARGET_LATENCY_SECONDS = 5.0            # Target time per /home request, rendering included
+ADAPTIVE_INITIAL_KEYS_PER_SECOND = 2000 # Conservative rate assumed before the first measurement
+ADAPTIVE_MAX_PAGES_PER_CHUNK = 16       # Upper bound on whole pages generated by one request
+ADAPTIVE_MIN_KEYS_PER_CHUNK = 250       # Lower bound on keys generated by one request
+
+# Public key generation backend
+# 'ecdsa' - one scalar multiplication per key with python-ecdsa
+# 'numpy' - whole pages at once with vectorized NumPy field arithmetic (requires numpy)
+KEY_ENGINE = 'ecdsa'
+
+# Key generation pipeline (KEY_PIPELINE_WORKERS env var overrides; 0 = generate in the request thread)
+# With N worker processes a page is split into batches of KEY_PIPELINE_BATCH_SIZE keys, at most
+# KEY_PIPELINE_QUEUE_SIZE of them in flight, and each worker derives hash160, address and WIF per batch.
+# The per-key work holds the GIL, so only separate processes on separate CPU cores can overlap it.
+KEY_PIPELINE_WORKERS = int(os.environ.get('KEY_PIPELINE_WORKERS', 0))
+KEY_PIPELINE_BATCH_SIZE = 4096
+KEY_PIPELINE_QUEUE_SIZE = 8
+
+# Near-miss tracking: record, per watchlist target, the generated key whose hash160
+# shares the longest leading-bit prefix with the target's hash160
+NEAR_MISS_TRACKING = True
+NEAR_MISS_MIN_BITS = 16  # Ignore near misses shorter than this many bits
+
+# Throughput analytics
+NODE_ID = os.environ.get('NODE_ID')      # Name of this node in analytics (defaults to the host name)
+ANALYTICS_RATE_WINDOW_SECONDS = 600      # Window used for the current aggregate rate and the ETA
+THROUGHPUT_RETENTION_HOURS = 24          # Per-minute throughput buckets older than this are pruned
+THROUGHPUT_EWMA_SMOOTHING = 0.2          # Weight of the newest sample in the global rate average
+
 # Performance options
-MAX_SEARCH_PAGES = 200   # Maximum pages to search through for address lookup (reduced for Vercel)
+MAX_SEARCH_PAGES = 200   # Default number of pages searched by an address lookup
+
+# Background search jobs (address lookups persist their progress and run slice by slice)
+MAX_SEARCH_JOB_PAGES = 1000000  # Maximum pages a single search job may cover
+# Worker threads per process. Serverless instances freeze threads once the response is sent, so on
+# Vercel there are none and a job advances by one slice per status request (the progress page polls).
+SEARCH_JOB_WORKERS = 0 if os.environ.get('VERCEL') else 2
+SEARCH_JOB_SLICE_PAGES = 5          # Pages a worker thread searches between progress commits
+SEARCH_JOB_REQUEST_SLICE_PAGES = 1  # Pages a status request searches for a job without a live owner
+SEARCH_JOB_STALE_SECONDS = 60       # A running job not advanced for this long has lost its owner
+
+# Jobs keep their state in the database, so every instance must see the same one: DATABASE_URL, or the
+# local SQLite file of a single server. Vercel's per-instance /tmp fallback is not shared, so there a
+# search runs inside the request over at most MAX_SEARCH_PAGES pages.
+SEARCH_JOBS_ENABLED = bool(os.environ.get('DATABASE_URL')) or not os.environ.get('VERCEL')
+
+# File-based tracking (TrackingService) options
+TRACKING_GROUP_COMMIT_SIZE = 64      # fsync the visited pages log after this many appends...
+TRACKING_GROUP_COMMIT_SECONDS = 1.0  # ...or when this many seconds have passed since the last fsync
+TRACKING_COMPACT_EVERY = 10000       # Compact the visited pages log after this many appends (0 disables)
 
 # API configuration - Optimized for Vercel serverless
 API_REQUEST_DELAY = 0.5   # seconds between API requests (increased for stability)
@@ -20,14 +81,22 @@ API_MAX_THREADS = 2       # maximum concurrent threads (reduced for Vercel)
 # Bitcoin configuration
 BITCOIN_MAX_NUMBER = 0xfffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364140
 
+# Fast start for serverless cold starts (FAST_START env var; on by default on Vercel)
+# SQLAlchemy and the models, the key generation stack (ecdsa/base58, NumPy) and the watchlist are
+# loaded by the first route that needs them instead of at import time
+FAST_START = os.environ.get('FAST_START', '1' if os.environ.get('VERCEL') else '0').lower() in ('1', 'true', 'yes')
+
+# Create missing tables when a process first uses the database. A fast-starting instance skips that
+# (the schema is set up once with `flask --app app init-db`), except for the throwaway SQLite file
+# of a Vercel instance without DATABASE_URL, which starts empty.
+CREATE_TABLES_ON_FIRST_USE = not FAST_START or (bool(os.environ.get('VERCEL')) and not os.environ.get('DATABASE_URL'))
+
 # Flask configuration
 FLASK_HOST = '0.0.0.0'
 FLASK_PORT = 5001
 FLASK_DEBUG = True  # Set to True for development (auto-reload templates)
 
 # Database configuration
-import os
-
 # Determine database URL
 if os.environ.get('DATABASE_URL'):
     # Supabase provided - use it
@@ -45,7 +114,10 @@ else:
     # Fall back to SQLite locally or on Vercel if DATABASE_URL not set
     # Note: On Vercel, data persists only during the current request
     # For persistent storage, please set DATABASE_URL to Supabase connection string
-    if os.environ.get('VERCEL'):
+    if os.environ.get('SQLITE_DB_PATH'):
+        # Explicit SQLite file (used by scripts/load_harness.py for a throwaway database)
+        _db_path = os.path.abspath(os.environ['SQLITE_DB_PATH'])
+    elif os.environ.get('VERCEL'):
         # On Vercel without DATABASE_URL, use /tmp for temporary storage
         _db_path = '/tmp/tracking.db'
     else:
@@ -55,6 +127,3 @@ else:
     
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{_db_path}'
     SQLALCHEMY_ENGINE_OPTIONS = {}
-
-SQLALCHEMY_TRACK_MODIFICATIONS = False
-
@@ -8,3 +8,4 @@ class AllKey:
     private_key: str
     hex_private_key: str
     address_compressed: str
+    hash160: Optional[bytes] = None  # RIPEMD160(SHA256(compressed public key)), used for near-miss tracking
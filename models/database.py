@@ -1,11 +1,41 @@
 """
 Database models for tracking visited pages and matched addresses
+
+The models use plain SQLAlchemy with a scoped session instead of
+Flask-SQLAlchemy. Nothing has to be registered with the Flask app for them,
+so app.py only imports this module (and SQLAlchemy) when the first route
+needs the database, and removes the session when an app context ends.
 """
 
-from flask_sqlalchemy import SQLAlchemy
+import sqlalchemy
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
 from datetime import datetime
+from config import SQLALCHEMY_DATABASE_URI, SQLALCHEMY_ENGINE_OPTIONS
+
+
+class Database:
+    """Engine, scoped session and model base
+
+    Other attributes come from the sqlalchemy module, so models and services
+    keep writing db.Column, db.func, db.case and so on.
+    """
+
+    def __init__(self, uri, engine_options):
+        # The engine connects on first use
+        self.engine = sqlalchemy.create_engine(uri, **engine_options)
+        self.session = scoped_session(sessionmaker(bind=self.engine))
+        self.Model = declarative_base()
+        self.Model.query = self.session.query_property()
 
-db = SQLAlchemy()
+    def create_all(self):
+        """Create the tables that do not exist yet"""
+        self.Model.metadata.create_all(self.engine)
+
+    def __getattr__(self, name):
+        return getattr(sqlalchemy, name)
+
+
+db = Database(SQLALCHEMY_DATABASE_URI, SQLALCHEMY_ENGINE_OPTIONS)
 
 
 class VisitedPage(db.Model):
@@ -20,6 +50,50 @@ class VisitedPage(db.Model):
         return f'<VisitedPage {self.page_number}>'
 
 
+class VisitedPagePart(db.Model):
+    """Track the generated parts of a page split by adaptive sizing until the whole page is visited"""
+    __tablename__ = 'visited_page_parts'
+    __table_args__ = (db.UniqueConstraint('page_number', 'parts', 'part', name='uq_visited_page_part'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    page_number = db.Column(db.String(255), nullable=False, index=True)
+    parts = db.Column(db.Integer, nullable=False)
+    part = db.Column(db.Integer, nullable=False)
+    visited_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<VisitedPagePart {self.page_number} {self.part}/{self.parts}>'
+
+
+class LegacyVisitedPage(db.Model):
+    """Visited pages recorded with the absolute page numbering used before pages counted from HEX_KEY_START
+    
+    An old page straddles two range-relative pages, so these rows cannot be renumbered.
+    They are kept for reference and are not part of coverage or visited checks.
+    """
+    __tablename__ = 'legacy_visited_pages'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    page_number = db.Column(db.String(255), nullable=False)
+    visited_at = db.Column(db.DateTime)
+    migrated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<LegacyVisitedPage {self.page_number}>'
+
+
+class SchemaMigration(db.Model):
+    """One-time data migrations applied to this database"""
+    __tablename__ = 'schema_migrations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), unique=True, nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SchemaMigration {self.name}>'
+
+
 class MatchedAddress(db.Model):
     """Track matched addresses found in watchlist"""
     __tablename__ = 'matched_addresses'
@@ -41,3 +115,125 @@ class MatchedAddress(db.Model):
             'address': self.address,
             'private_key': self.private_key
         }
+
+
+class NearMiss(db.Model):
+    """Track the best near miss (longest common hash160 prefix) found for each watchlist target"""
+    __tablename__ = 'near_misses'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    target_address = db.Column(db.String(255), unique=True, nullable=False, index=True)
+    prefix_bits = db.Column(db.Integer, nullable=False)
+    address = db.Column(db.String(255), nullable=False)
+    private_key = db.Column(db.String(255), nullable=False)
+    page_number = db.Column(db.String(255), nullable=False)
+    found_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<NearMiss {self.target_address} {self.prefix_bits} bits>'
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'target_address': self.target_address,
+            'prefix_bits': self.prefix_bits,
+            'address': self.address,
+            'private_key': self.private_key,
+            'page_number': self.page_number,
+            'found_at': self.found_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+
+class ThroughputSample(db.Model):
+    """Per-minute throughput bucket for one worker (rolling history, pruned after a retention period)"""
+    __tablename__ = 'throughput_samples'
+    __table_args__ = (db.UniqueConstraint('bucket_start', 'worker_id', name='uq_throughput_bucket_worker'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    bucket_start = db.Column(db.DateTime, nullable=False, index=True)
+    node_id = db.Column(db.String(255), nullable=False)
+    worker_id = db.Column(db.String(255), nullable=False)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    keys = db.Column(db.BigInteger, nullable=False, default=0)
+    seconds = db.Column(db.Float, nullable=False, default=0.0)
+    new_pages = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ThroughputSample {self.worker_id} {self.bucket_start}>'
+
+
+class ThroughputTotal(db.Model):
+    """Running totals of all workers (scope 'global'), updated with every sample
+    
+    Per-node and per-worker figures are aggregated from ThroughputSample buckets instead.
+    """
+    __tablename__ = 'throughput_totals'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(255), unique=True, nullable=False, index=True)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    keys = db.Column(db.BigInteger, nullable=False, default=0)
+    seconds = db.Column(db.Float, nullable=False, default=0.0)
+    rate_ewma = db.Column(db.Float, nullable=False, default=0.0)
+    visited_pages = db.Column(db.BigInteger, nullable=False, default=0)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ThroughputTotal {self.scope}>'
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'scope': self.scope,
+            'samples': self.samples,
+            'keys': self.keys,
+            'seconds': round(self.seconds, 3),
+            'average_rate': round(self.keys / self.seconds, 1) if self.seconds else 0.0,
+            'rate_ewma': round(self.rate_ewma, 1),
+            'visited_pages': self.visited_pages,
+            'last_seen': self.last_seen.strftime('%Y-%m-%d %H:%M:%S') if self.last_seen else None
+        }
+
+
+class SearchJob(db.Model):
+    """Track background address search jobs so they survive across requests"""
+    __tablename__ = 'search_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    address = db.Column(db.String(255), nullable=False)
+    start_page = db.Column(db.String(255), nullable=False)
+    end_page = db.Column(db.String(255), nullable=False)
+    next_page = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    result_page = db.Column(db.String(255), nullable=True)
+    result_position = db.Column(db.Integer, nullable=True)
+    result_private_key = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SearchJob {self.id} {self.status}>'
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        start_page = int(self.start_page)
+        end_page = int(self.end_page)
+        pages_done = min(int(self.next_page), end_page + 1) - start_page
+        total_pages = end_page - start_page + 1
+        return {
+            'id': self.id,
+            'address': self.address,
+            'status': self.status,
+            'start_page': start_page,
+            'end_page': end_page,
+            'pages_done': pages_done,
+            'total_pages': total_pages,
+            'progress': round(100.0 * pages_done / total_pages, 2) if total_pages else 100.0,
+            'page': int(self.result_page) if self.result_page else None,
+            'position': self.result_position,
+            'private_key': self.result_private_key,
+            'error': self.error,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+
+@dataclass
+class WorkChunk:
+    """A unit of key-generation work mapped onto the fixed page grid
+
+    A chunk either covers `span` whole consecutive pages starting at `page`,
+    or one `part` out of `parts` equal slices of a single page.
+    """
+    page: int
+    span: int = 1
+    part: int = 0
+    parts: int = 1
+    
+    @property
+    def last_page(self) -> int:
+        """Last grid page touched by this chunk"""
+        return self.page + self.span - 1
+    
+    def key_offsets(self, limit_per_page: int) -> tuple[int, int]:
+        """Return (offset, count) of the chunk's keys relative to the first key of `page`"""
+        if self.parts <= 1:
+            return 0, limit_per_page * self.span
+        
+        part_size = -(-limit_per_page // self.parts)  # ceil division
+        offset = self.part * part_size
+        return offset, max(0, min(part_size, limit_per_page - offset))
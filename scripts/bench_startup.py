@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark: normal startup vs FAST_START
+
+Every run starts a fresh Python process (like a new serverless instance),
+imports the app and serves one first request through the test client. The
+import time, the first response time and the modules loaded are reported
+per mode as medians over --runs processes:
+
+    python scripts/bench_startup.py --runs 5 --path /about --path /analytics
+
+Each mode is measured against a throwaway SQLite database whose schema was
+created up front ("ready", as after `flask --app app init-db`) and against
+a fresh empty database per run ("empty", run with VERCEL=1 like a Vercel
+instance with its own /tmp database, which creates the tables on first
+use), so runs never touch data/tracking.db.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs inside the child process; prints one JSON line with the measurements
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+response = app.test_client().get(sys.argv[1])
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (served - imported) * 1000,
+    'status': response.status_code,
+    'sqlalchemy': 'sqlalchemy' in sys.modules,
+    'ecdsa': 'ecdsa' in sys.modules,
+    'numpy': 'numpy' in sys.modules,
+}))
+'''
+
+
+def child_env(fast_start, db_path, vercel=False):
+    """Environment for one child process"""
+    env = dict(os.environ)
+    env.pop('DATABASE_URL', None)
+    env.pop('VERCEL', None)
+    if vercel:
+        env['VERCEL'] = '1'
+    env['SQLITE_DB_PATH'] = db_path
+    env['FAST_START'] = '1' if fast_start else '0'
+    return env
+
+
+def run_probe(path, fast_start, db_path, vercel):
+    """Start a fresh interpreter, import the app and serve `path` once"""
+    output = subprocess.run([sys.executable, '-c', PROBE, path], cwd=ROOT,
+                            env=child_env(fast_start, db_path, vercel),
+                            capture_output=True, text=True, check=True).stdout
+    # The app prints status lines of its own; the measurements are the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def create_schema(db_path):
+    """Create the tables of the throwaway database once, as `init-db` would"""
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'], cwd=ROOT,
+                   env=child_env(True, db_path), capture_output=True, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cold start time with and without FAST_START")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh processes per mode, schema state and path")
+    parser.add_argument('--path', action='append', default=None, help="First request path (repeatable)")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+    paths = args.path or ['/about', '/random', '/analytics']
+
+    work_dir = tempfile.mkdtemp(prefix='bench-startup-')
+    ready_db = os.path.join(work_dir, 'ready.db')
+    create_schema(ready_db)
+
+    report = []
+    for path in paths:
+        for schema in ('ready', 'empty'):
+            for fast_start in (False, True):
+                samples = []
+                for run in range(args.runs):
+                    db_path = ready_db
+                    if schema == 'empty':
+                        db_path = os.path.join(work_dir, f'empty-{len(report)}-{run}.db')
+                    samples.append(run_probe(path, fast_start, db_path, vercel=schema == 'empty'))
+                import_ms = statistics.median(s['import_ms'] for s in samples)
+                request_ms = statistics.median(s['first_request_ms'] for s in samples)
+                last = samples[-1]
+                report.append({
+                    'path': path,
+                    'schema': schema,
+                    'mode': 'fast_start' if fast_start else 'normal',
+                    'status': last['status'],
+                    'import_ms': round(import_ms, 1),
+                    'first_request_ms': round(request_ms, 1),
+                    'cold_start_ms': round(import_ms + request_ms, 1),
+                    'loaded': [name for name in ('sqlalchemy', 'ecdsa', 'numpy') if last[name]],
+                })
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'path':12} {'schema':7} {'mode':11} {'status':>6} {'import ms':>10} {'1st req ms':>11} {'total ms':>9}  loaded")
+    for row in report:
+        print(f"{row['path']:12} {row['schema']:7} {row['mode']:11} {row['status']:>6} {row['import_ms']:>10} "
+              f"{row['first_request_ms']:>11} {row['cold_start_ms']:>9}  {', '.join(row['loaded']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Equivalence check: NumPy key engine vs ecdsa
+
+Generates the same runs of keys with both backends and compares them:
+the raw compressed public keys of services/numpy_key_engine.py against
+python-ecdsa point multiplication, and the AllKey rows (WIF, address,
+hash160) of AllKeyService with KEY_ENGINE 'numpy' against 'ecdsa'. Runs
+cover the start and the end of the configured range, random offsets in
+it, runs that are partly outside it and random runs anywhere on the curve
+(the limb arithmetic does not depend on the range). Exits with status 1 on
+any mismatch, so it can guard edits to _mul/_reduce:
+
+    python scripts/check_key_engines.py --count 512 --random-runs 3 --seed 1
+"""
+
+import argparse
+import os
+import random
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from ecdsa import SECP256k1  # noqa: E402
+from config import HEX_KEY_START, HEX_KEY_END  # noqa: E402
+from services import numpy_key_engine  # noqa: E402
+from services.all_key_service import AllKeyService  # noqa: E402
+
+
+def ecdsa_compressed_public_key(key_id):
+    """Compressed public key of a private key computed with python-ecdsa"""
+    point = SECP256k1.generator * key_id
+    return bytes([2 + (point.y() & 1)]) + point.x().to_bytes(32, 'big')
+
+
+def check_public_keys(first_key, count):
+    """Compare raw engine output with ecdsa; return the number of mismatching keys"""
+    public_keys = numpy_key_engine.compressed_public_keys(first_key, count)
+    return sum(public_keys[i].tobytes() != ecdsa_compressed_public_key(first_key + i) for i in range(count))
+
+
+def check_rows(numpy_service, ecdsa_service, first_key, count):
+    """Compare AllKeyService rows of both backends; return the number of mismatching rows"""
+    expected = ecdsa_service.get_range(first_key, count)
+    actual = numpy_service.get_range(first_key, count)
+    if len(actual) != len(expected):
+        return max(len(actual), len(expected))
+    fields = ('hex_private_key', 'private_key', 'address_compressed', 'hash160')
+    return sum(any(getattr(a, f) != getattr(e, f) for f in fields) for a, e in zip(actual, expected))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the NumPy key engine against python-ecdsa")
+    parser.add_argument('--count', type=int, default=512, help="Keys per run")
+    parser.add_argument('--random-runs', type=int, default=3, help="Random runs inside the range and on the curve")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed (printed, so failures can be replayed)")
+    args = parser.parse_args()
+
+    if not numpy_key_engine.is_available():
+        print("NumPy is not installed, nothing to check")
+        return 1
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    rng = random.Random(seed)
+    count = args.count
+    order = SECP256k1.order
+
+    # (name, first key, check the engine directly, check AllKeyService rows)
+    runs = [
+        ('range start', HEX_KEY_START, True, True),
+        ('range end', HEX_KEY_END - count + 1, True, True),
+        ('before range start', HEX_KEY_START - count // 2, False, True),
+        ('past range end', HEX_KEY_END - count // 2 + 1, False, True),
+    ]
+    for i in range(args.random_runs):
+        runs.append((f'random in range #{i + 1}', rng.randint(HEX_KEY_START, HEX_KEY_END - count + 1), True, True))
+    for i in range(args.random_runs):
+        runs.append((f'random on curve #{i + 1}', rng.randint(2 * count, order - 2 * count), True, False))
+
+    numpy_service = AllKeyService(engine='numpy')
+    ecdsa_service = AllKeyService(engine='ecdsa')
+
+    failures = 0
+    print(f"seed {seed}, {count} keys per run")
+    for name, first_key, engine_check, rows_check in runs:
+        mismatches = 0
+        if engine_check:
+            mismatches += check_public_keys(first_key, count)
+        if rows_check:
+            mismatches += check_rows(numpy_service, ecdsa_service, first_key, count)
+        failures += mismatches
+        print(f"{'FAIL' if mismatches else 'ok':4}  {name:22} first key {first_key:#x}  {mismatches} mismatches")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
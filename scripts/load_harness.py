@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+End-to-end load harness simulating auto-scan browsers
+
+Each simulated client repeats what the auto-click loop in base.html does:
+GET /random, follow the redirect to /home, download the full page. The
+harness reports latency percentiles, pages/min, response sizes and time
+spent in the database.
+
+By default the Flask app is loaded in-process with a throwaway SQLite
+database, so runs never touch data/tracking.db:
+
+    python scripts/load_harness.py --clients 4 --cycles 10 --page-size 500
+
+Use --url to drive an already running deployment over HTTP instead
+(database metrics are then unavailable):
+
+    python scripts/load_harness.py --url http://localhost:5001 --clients 8 --duration 60
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of a list of numbers (nearest rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class Stats:
+    """Thread-safe collector for per-request measurements"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.random_latencies = []
+        self.home_latencies = []
+        self.cycle_latencies = []
+        self.response_sizes = []
+        self.errors = []
+
+    def record_cycle(self, random_seconds, home_seconds, size):
+        with self.lock:
+            self.random_latencies.append(random_seconds)
+            self.home_latencies.append(home_seconds)
+            self.cycle_latencies.append(random_seconds + home_seconds)
+            self.response_sizes.append(size)
+
+    def record_error(self, message):
+        with self.lock:
+            self.errors.append(message)
+
+
+class DatabaseStats:
+    """Time spent in SQL statements and lock errors, collected with SQLAlchemy engine events"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.lock = threading.Lock()
+        self.statements = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.lock_errors = 0
+        self._started = threading.local()
+
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+        event.listen(engine, 'handle_error', self._error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        self._started.value = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - getattr(self._started, 'value', time.perf_counter())
+        with self.lock:
+            self.statements += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    def _error(self, context):
+        # SQLite reports writer contention as "database is locked", PostgreSQL as lock timeouts
+        if 'lock' in str(context.original_exception).lower():
+            with self.lock:
+                self.lock_errors += 1
+
+
+class InProcessClient:
+    """Drives the Flask app through its test client"""
+
+    def __init__(self, app, view):
+        self.client = app.test_client()
+        self.view = view
+
+    def cycle(self):
+        query = {'view': self.view} if self.view else {}
+
+        started = time.perf_counter()
+        response = self.client.get('/random', query_string=query)
+        random_seconds = time.perf_counter() - started
+        if response.status_code != 302:
+            raise RuntimeError(f"/random returned {response.status_code}")
+
+        started = time.perf_counter()
+        response = self.client.get(response.headers['Location'], headers={'Accept-Encoding': 'gzip'})
+        size = len(response.get_data())
+        home_seconds = time.perf_counter() - started
+        if response.status_code != 200:
+            raise RuntimeError(f"/home returned {response.status_code}")
+
+        return random_seconds, home_seconds, size
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class HttpClient:
+    """Drives a running server over HTTP"""
+
+    def __init__(self, base_url, view, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.view = view
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(_NoRedirect)
+
+    def cycle(self):
+        url = self.base_url + '/random'
+        if self.view:
+            url += '?' + urllib.parse.urlencode({'view': self.view})
+
+        started = time.perf_counter()
+        try:
+            self.opener.open(url, timeout=self.timeout)
+            raise RuntimeError("/random did not redirect")
+        except urllib.error.HTTPError as e:
+            if e.code != 302:
+                raise RuntimeError(f"/random returned {e.code}")
+            location = urllib.parse.urljoin(self.base_url + '/', e.headers['Location'])
+        random_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        request = urllib.request.Request(location, headers={'Accept-Encoding': 'gzip'})
+        with self.opener.open(request, timeout=self.timeout) as response:
+            size = len(response.read())
+        home_seconds = time.perf_counter() - started
+
+        return random_seconds, home_seconds, size
+
+
+def run_client(client, stats, cycles, deadline):
+    """Run cycles until the cycle count or the deadline is reached"""
+    done = 0
+    while (cycles is None or done < cycles) and (deadline is None or time.perf_counter() < deadline):
+        try:
+            stats.record_cycle(*client.cycle())
+        except Exception as e:
+            stats.record_error(f"{type(e).__name__}: {e}")
+        done += 1
+
+
+def load_app(args):
+    """Import the app in-process against a throwaway SQLite database"""
+    db_dir = tempfile.mkdtemp(prefix='load-harness-')
+    os.environ.pop('DATABASE_URL', None)
+    os.environ['SQLITE_DB_PATH'] = os.path.join(db_dir, 'tracking.db')
+    if args.page_size:
+        os.environ['ADDRESSES_PER_PAGE'] = str(args.page_size)
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    from app import app, get_db, create_tables
+
+    with app.app_context():
+        db = get_db()
+        create_tables()  # Also needed with FAST_START, which leaves the schema to init-db
+        db_stats = DatabaseStats(db.engine)
+    return app, db_stats
+
+
+def summarize(stats, db_stats, elapsed, args):
+    """Build the report dictionary"""
+    def latency(values):
+        return {
+            'p50_ms': round(percentile(values, 50) * 1000, 1),
+            'p90_ms': round(percentile(values, 90) * 1000, 1),
+            'p99_ms': round(percentile(values, 99) * 1000, 1),
+            'max_ms': round(max(values, default=0) * 1000, 1),
+        }
+
+    pages = len(stats.home_latencies)
+    report = {
+        'clients': args.clients,
+        'target': args.url or 'in-process',
+        'view': args.view or 'default',
+        'elapsed_s': round(elapsed, 2),
+        'pages': pages,
+        'errors': len(stats.errors),
+        'pages_per_min': round(pages / elapsed * 60, 1) if elapsed else 0.0,
+        'random_latency': latency(stats.random_latencies),
+        'home_latency': latency(stats.home_latencies),
+        'cycle_latency': latency(stats.cycle_latencies),
+        'response_bytes': {
+            'mean': int(sum(stats.response_sizes) / pages) if pages else 0,
+            'max': max(stats.response_sizes, default=0),
+        },
+    }
+    if db_stats is not None:
+        report['database'] = {
+            'statements': db_stats.statements,
+            'total_s': round(db_stats.total_seconds, 3),
+            'mean_ms': round(db_stats.total_seconds / db_stats.statements * 1000, 2) if db_stats.statements else 0.0,
+            'max_ms': round(db_stats.max_seconds * 1000, 2),
+            'share_of_wall_time_pct': round(100 * db_stats.total_seconds / (elapsed * args.clients), 1) if elapsed else 0.0,
+            'lock_errors': db_stats.lock_errors,
+        }
+    if stats.errors:
+        report['first_errors'] = stats.errors[:5]
+    return report
+
+
+def print_report(report):
+    """Print the report as a readable table"""
+    print("=" * 60)
+    print(f"Target: {report['target']}  clients: {report['clients']}  view: {report['view']}")
+    print(f"Pages: {report['pages']} in {report['elapsed_s']}s  ->  {report['pages_per_min']} pages/min")
+    print(f"Errors: {report['errors']}")
+    for name in ('random_latency', 'home_latency', 'cycle_latency'):
+        values = report[name]
+        print(f"{name:16} p50 {values['p50_ms']:>9} ms  p90 {values['p90_ms']:>9} ms  "
+              f"p99 {values['p99_ms']:>9} ms  max {values['max_ms']:>9} ms")
+    print(f"Response size: mean {report['response_bytes']['mean']} B, max {report['response_bytes']['max']} B")
+    if 'database' in report:
+        database = report['database']
+        print(f"Database: {database['statements']} statements, {database['total_s']}s total, "
+              f"mean {database['mean_ms']} ms, max {database['max_ms']} ms, "
+              f"{database['share_of_wall_time_pct']}% of client time, {database['lock_errors']} lock errors")
+    for error in report.get('first_errors', []):
+        print(f"  ! {error}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate N auto-scan browsers against the app")
+    parser.add_argument('--clients', type=int, default=4, help="Concurrent simulated browsers")
+    parser.add_argument('--cycles', type=int, default=None, help="/random -> /home cycles per client")
+    parser.add_argument('--duration', type=float, default=None, help="Run for this many seconds instead")
+    parser.add_argument('--url', default=None, help="Base URL of a running server (default: in-process app)")
+    parser.add_argument('--view', choices=['table', 'virtual'], default=None, help="Results view to request")
+    parser.add_argument('--page-size', type=int, default=None,
+                        help="Override ADDRESSES_PER_PAGE for the in-process app")
+    parser.add_argument('--timeout', type=float, default=120.0, help="HTTP timeout in seconds")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.cycles is None and args.duration is None:
+        args.cycles = 5
+
+    db_stats = None
+    if args.url:
+        make_client = lambda: HttpClient(args.url, args.view, args.timeout)
+    else:
+        app, db_stats = load_app(args)
+        make_client = lambda: InProcessClient(app, args.view)
+
+    stats = Stats()
+    started = time.perf_counter()
+    deadline = started + args.duration if args.duration else None
+    threads = [threading.Thread(target=run_client, args=(make_client(), stats, args.cycles, deadline))
+               for _ in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = summarize(stats, db_stats, elapsed, args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import math
+import threading
+from models.work_chunk import WorkChunk
+
+class AdaptiveSizingService:
+    """Service for sizing work chunks to a target latency from measured throughput
+    
+    Keys/sec is tracked as an exponential moving average over whole requests
+    (key generation, database work and rendering). A chunk is then sized so that
+    its request takes about `target_seconds`: a fast instance gets several whole
+    pages per request, a slow or cold one gets a page split into parts. Page
+    numbers always stay on the fixed ADDRESSES_PER_PAGE grid.
+    """
+    
+    def __init__(self, limit_per_page: int, target_seconds: float, initial_keys_per_second: float,
+                 max_pages_per_chunk: int, min_keys_per_chunk: int, smoothing: float = 0.3):
+        self.limit_per_page = limit_per_page
+        self.target_seconds = target_seconds
+        self.keys_per_second = initial_keys_per_second
+        self.max_pages_per_chunk = max(1, max_pages_per_chunk)
+        self.min_keys_per_chunk = max(1, min_keys_per_chunk)
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+    
+    def record(self, keys: int, seconds: float) -> None:
+        """Record the measured time of a request that handled `keys` keys"""
+        if keys <= 0 or seconds <= 0:
+            return
+        
+        rate = keys / seconds
+        with self._lock:
+            self.keys_per_second = self.smoothing * rate + (1 - self.smoothing) * self.keys_per_second
+    
+    def plan(self, page: int, max_page: int) -> WorkChunk:
+        """Plan the chunk starting at `page` that fits the latency target"""
+        with self._lock:
+            budget = self.keys_per_second * self.target_seconds
+        budget = max(budget, self.min_keys_per_chunk)
+        
+        if budget >= self.limit_per_page:
+            # Fast instance: cover several whole pages, without running past the last page
+            span = min(int(budget // self.limit_per_page), self.max_pages_per_chunk)
+            span = max(1, min(span, max_page - page + 1))
+            return WorkChunk(page=page, span=span)
+        
+        # Slow instance: split the page into equal parts
+        return WorkChunk(page=page, parts=math.ceil(self.limit_per_page / budget))
+    
+    def chunk_for(self, page: int, part, parts, max_page: int) -> WorkChunk:
+        """Resume a split page from request arguments, or plan a new chunk"""
+        try:
+            part = int(part)
+            parts = int(parts)
+        except (ValueError, TypeError):
+            return self.plan(page, max_page)
+        
+        # Keep the split a page was started with, so its parts tile the page exactly
+        if parts < 2 or not 0 <= part < parts or parts > self.limit_per_page:
+            return self.plan(page, max_page)
+        return WorkChunk(page=page, part=part, parts=parts)
@@ -3,46 +3,105 @@ import ecdsa
 from ecdsa import SigningKey, SECP256k1
 import base58
 from models.all_key import AllKey
-from config import HEX_KEY_START, HEX_KEY_END
+from services.page_range import page_first_key, key_page, range_max_page, clip_to_range
+from config import KEY_ENGINE, KEY_PIPELINE_WORKERS, KEY_PIPELINE_BATCH_SIZE, KEY_PIPELINE_QUEUE_SIZE
 
 class AllKeyService:
     """Service for generating Bitcoin private keys and compressed legacy addresses"""
     
-    def __init__(self):
+    def __init__(self, engine: str = KEY_ENGINE, pipeline_workers: int = KEY_PIPELINE_WORKERS):
         self.curve = SECP256k1
+        
+        # 'numpy' generates a whole page of public keys with vectorized field arithmetic.
+        # The backend (and NumPy itself) is only imported when selected, to keep cold starts short.
+        self.numpy_engine = None
+        if engine == 'numpy':
+            from services import numpy_key_engine
+            if numpy_key_engine.is_available():
+                self.numpy_engine = numpy_key_engine
+            else:
+                print("⚠ KEY_ENGINE is 'numpy' but NumPy is not installed, using ecdsa")
+                engine = 'ecdsa'
+        self.engine = engine
+        
+        # With pipeline workers, runs longer than one batch are generated by a process pool
+        self.pipeline = None
+        if pipeline_workers > 0:
+            from services.key_pipeline import KeyPipeline
+            self.pipeline = KeyPipeline(engine, pipeline_workers, KEY_PIPELINE_BATCH_SIZE, KEY_PIPELINE_QUEUE_SIZE)
     
     def get_data(self, page: int, limit_per_page: int) -> list[AllKey]:
         """Generate Bitcoin keys for a specific page within the configured range"""
+        return self.get_range(page_first_key(page, limit_per_page), limit_per_page)
+    
+    def get_range(self, first_key_id: int, count: int) -> list[AllKey]:
+        """Generate `count` consecutive Bitcoin keys starting at `first_key_id` within the configured range"""
+        # Intersect with the configured range up front; runs entirely outside it cost nothing
+        key_range = clip_to_range(first_key_id, count)
+        if key_range is None:
+            return []
+        low, high = key_range
+        
+        if self.pipeline is not None and high - low + 1 > self.pipeline.batch_size:
+            items = self.pipeline.get_range(low, high)
+            if items is not None:
+                return items
+        
+        if self.engine == 'numpy':
+            items = self._get_range_numpy(low, high)
+            if items is not None:
+                return items
+        
         items = []
         
-        for index in range(limit_per_page):
-            # Calculate the key ID for this position
-            key_id = (page - 1) * limit_per_page + index + 1
-            
-            # Check if key is within the configured range
-            if key_id < HEX_KEY_START or key_id > HEX_KEY_END:
-                continue
-            
+        for key_id in range(low, high + 1):
             # Convert to hex and pad to 64 characters (32 bytes)
             id_hex = hex(key_id)[2:]  # Remove '0x' prefix
             # Pad with zeros to make it 64 characters (32 bytes)
             id_hex = id_hex.zfill(64)
             
             # Generate only compressed legacy address
-            address_compressed = self._get_address(id_hex, compressed=True)
+            address_compressed, hash160 = self._get_address_and_hash160(id_hex)
             private_key = self._get_private_key(id_hex)
             
             items.append(AllKey(
                 id=id_hex,
                 private_key=private_key,
                 hex_private_key=id_hex,
-                address_compressed=address_compressed
+                address_compressed=address_compressed,
+                hash160=hash160
+            ))
+        
+        return items
+    
+    def _get_range_numpy(self, low: int, high: int):
+        """Generate keys `low` to `high` with the NumPy backend, or return None to use the serial path"""
+        try:
+            public_keys = self.numpy_engine.compressed_public_keys(low, high - low + 1)
+        except ArithmeticError:
+            # Degenerate additions only occur near key 0 or the group order
+            return None
+        
+        items = []
+        for index, key_id in enumerate(range(low, high + 1)):
+            id_hex = hex(key_id)[2:].zfill(64)
+            hash160 = self._public_key_to_hash160(public_keys[index].tobytes())
+            items.append(AllKey(
+                id=id_hex,
+                private_key=self._get_private_key(id_hex),
+                hex_private_key=id_hex,
+                address_compressed=self._hash160_to_address(hash160),
+                hash160=hash160
             ))
         
         return items
     
     def _get_address(self, key_hex: str, compressed: bool = True) -> str:
         """Generate compressed Bitcoin legacy address from private key"""
+        return self._get_address_and_hash160(key_hex)[0]
+    
+    def _get_address_and_hash160(self, key_hex: str):
+        """Generate compressed Bitcoin legacy address and its hash160 from private key"""
         try:
             # Convert hex to bytes
             private_key_bytes = bytes.fromhex(key_hex)
@@ -61,10 +120,21 @@ class AllKeyService:
                 public_key_compressed = b'\x03' + public_key[:32]
             public_key_bytes = public_key_compressed
             
-            # Hash the public key
-            sha256_hash = hashlib.sha256(public_key_bytes).digest()
-            ripemd160_hash = hashlib.new('ripemd160', sha256_hash).digest()
+            hash160 = self._public_key_to_hash160(public_key_bytes)
+            return self._hash160_to_address(hash160), hash160
             
+        except Exception as e:
+            print(f"Error generating address: {e}")
+            return "Error", None
+    
+    def _public_key_to_hash160(self, public_key_bytes: bytes) -> bytes:
+        """Hash a serialized public key: RIPEMD160(SHA256(public key))"""
+        sha256_hash = hashlib.sha256(public_key_bytes).digest()
+        return hashlib.new('ripemd160', sha256_hash).digest()
+    
+    def _hash160_to_address(self, ripemd160_hash: bytes) -> str:
+        """Generate Bitcoin legacy address from a public key hash"""
+        try:
             # Add version byte (0x00 for mainnet)
             versioned_payload = b'\x00' + ripemd160_hash
             
@@ -0,0 +1,208 @@
+"""
+Analytics service for throughput history and coverage projections
+
+Every /home request records one throughput sample with two statements: an
+upsert into the per-minute bucket of its worker (rolling history, pruned
+after THROUGHPUT_RETENTION_HOURS) and an atomic update of the global running
+total, which also counts distinct visited pages. Per-node and per-worker
+figures are aggregated from the buckets, so workers of recycled serverless
+instances age out with their buckets and the analytics view never scans the
+tracking tables.
+"""
+
+import os
+import socket
+from datetime import datetime, timedelta
+from models.database import db, VisitedPage, ThroughputSample, ThroughputTotal
+from services.database_service import DatabaseService
+from config import NODE_ID, ANALYTICS_RATE_WINDOW_SECONDS, THROUGHPUT_RETENTION_HOURS, THROUGHPUT_EWMA_SMOOTHING
+
+GLOBAL_SCOPE = 'global'
+
+# Prune expired buckets with the first sample of a process and then once every this many samples,
+# so short-lived serverless instances prune as well
+PRUNE_EVERY = 500
+
+
+def node_id():
+    """Identify this node (NODE_ID setting, falling back to the host name)"""
+    return NODE_ID or socket.gethostname()
+
+
+def worker_id():
+    """Identify this worker process within the node"""
+    return f"{node_id()}/{os.getpid()}"
+
+
+class AnalyticsService:
+    """Service to record throughput samples and read precomputed coverage analytics"""
+
+    _samples_since_prune = None
+
+    @staticmethod
+    def _count_range_pages(max_page):
+        """Count visited pages numbered 1..max_page
+        
+        Page numbers are stored as decimal strings, so the range check compares
+        lengths first and then the strings themselves.
+        """
+        page = VisitedPage.page_number
+        length = db.func.length(page)
+        limit = str(max_page)
+        return VisitedPage.query.filter(
+            ~page.startswith('0'), ~page.startswith('-'),
+            db.or_(length < len(limit), db.and_(length == len(limit), page <= limit))
+        ).count()
+    
+    @staticmethod
+    def record_throughput(keys, seconds, new_pages, max_page):
+        """Record one throughput sample: keys generated, time taken and newly visited pages
+        
+        Pages added with DatabaseService.add_visited_page(commit=False) are committed
+        together with the counters, so the coverage counter never misses or double
+        counts them. Counters are bumped with atomic UPDATE ... SET col = col + n
+        statements, so concurrent workers and nodes do not lose updates.
+        """
+        try:
+            now = datetime.utcnow()
+            
+            DatabaseService.insert_or_increment(
+                ThroughputSample, ['bucket_start', 'worker_id'],
+                {'bucket_start': now.replace(second=0, microsecond=0), 'node_id': node_id(), 'worker_id': worker_id()},
+                {'samples': 1, 'keys': keys, 'seconds': seconds, 'new_pages': new_pages}
+            )
+            
+            values = {
+                ThroughputTotal.samples: ThroughputTotal.samples + 1,
+                ThroughputTotal.keys: ThroughputTotal.keys + keys,
+                ThroughputTotal.seconds: ThroughputTotal.seconds + seconds,
+                ThroughputTotal.visited_pages: ThroughputTotal.visited_pages + new_pages,
+                ThroughputTotal.last_seen: now
+            }
+            if seconds > 0:
+                rate = keys / seconds
+                values[ThroughputTotal.rate_ewma] = db.case(
+                    (ThroughputTotal.rate_ewma == 0, rate),
+                    else_=THROUGHPUT_EWMA_SMOOTHING * rate + (1 - THROUGHPUT_EWMA_SMOOTHING) * ThroughputTotal.rate_ewma
+                )
+            global_total = ThroughputTotal.query.filter_by(scope=GLOBAL_SCOPE)
+            if not global_total.update(values, synchronize_session=False):
+                # First sample of this database: seed the coverage counter with the pages visited so
+                # far. The count includes this request's own uncommitted pages; another request's pages
+                # are committed together with its counter update, so they are either counted here or
+                # added by that request.
+                created = DatabaseService.insert_if_missing(
+                    ThroughputTotal, scope=GLOBAL_SCOPE, samples=0, keys=0, seconds=0.0, rate_ewma=0.0,
+                    visited_pages=AnalyticsService._count_range_pages(max_page), last_seen=now)
+                if created:
+                    values[ThroughputTotal.visited_pages] = ThroughputTotal.visited_pages
+                global_total.update(values, synchronize_session=False)
+            
+            if AnalyticsService._samples_since_prune is None or AnalyticsService._samples_since_prune >= PRUNE_EVERY:
+                AnalyticsService._samples_since_prune = 0
+                cutoff = now - timedelta(hours=THROUGHPUT_RETENTION_HOURS)
+                ThroughputSample.query.filter(ThroughputSample.bucket_start < cutoff).delete()
+            AnalyticsService._samples_since_prune += 1
+            
+            db.session.commit()
+            return True
+        except Exception as e:
+            print(f"Error recording throughput: {e}")
+            db.session.rollback()
+            return False
+    
+    @staticmethod
+    def get_covered_pages():
+        """Get the number of distinct visited pages from the global total"""
+        try:
+            total = ThroughputTotal.query.filter_by(scope=GLOBAL_SCOPE).first()
+            return total.visited_pages if total else 0
+        except Exception as e:
+            print(f"Error reading covered pages: {e}")
+            return 0
+
+    @staticmethod
+    def get_summary(max_page, limit_per_page):
+        """Get coverage, current rate and projected time to exhaust the configured range"""
+        try:
+            now = datetime.utcnow()
+            window_start = now - timedelta(seconds=ANALYTICS_RATE_WINDOW_SECONDS)
+
+            global_total = ThroughputTotal.query.filter_by(scope=GLOBAL_SCOPE).first()
+            covered_pages = global_total.visited_pages if global_total else 0
+
+            # Per-worker sums over the retained buckets and over the rate window, in one query
+            retention_start = now - timedelta(hours=THROUGHPUT_RETENTION_HOURS)
+            in_window = ThroughputSample.bucket_start >= window_start
+            buckets = db.session.query(
+                ThroughputSample.node_id,
+                ThroughputSample.worker_id,
+                db.func.sum(ThroughputSample.samples),
+                db.func.sum(ThroughputSample.keys),
+                db.func.sum(ThroughputSample.seconds),
+                db.func.sum(db.case((in_window, ThroughputSample.keys), else_=0)),
+                db.func.sum(db.case((in_window, ThroughputSample.seconds), else_=0.0)),
+                db.func.sum(db.case((in_window, ThroughputSample.new_pages), else_=0)),
+                db.func.min(db.case((in_window, ThroughputSample.bucket_start))),
+                db.func.max(ThroughputSample.bucket_start)
+            ).filter(ThroughputSample.bucket_start >= retention_start).group_by(
+                ThroughputSample.node_id, ThroughputSample.worker_id).all()
+
+            # Current aggregate rate: everything recorded by all workers in the recent window
+            window_keys = sum(row[5] for row in buckets)
+            window_pages = sum(row[7] for row in buckets)
+            first_bucket = min((row[8] for row in buckets if row[8] is not None), default=None)
+            # A deployment younger than the window is measured over its actual uptime (at least one minute)
+            window_seconds = ANALYTICS_RATE_WINDOW_SECONDS
+            if first_bucket is not None:
+                window_seconds = max(60.0, min(window_seconds, (now - first_bucket).total_seconds()))
+            keys_per_second = window_keys / window_seconds
+            new_pages_per_second = window_pages / window_seconds
+
+            # Projection uses the rate of newly covered pages, so revisited pages do not count as progress
+            remaining_pages = max(0, max_page - covered_pages)
+            eta_seconds = remaining_pages / new_pages_per_second if new_pages_per_second > 0 else None
+
+            def grouped(name_of):
+                """Sum the worker rows per name; a row counts as active while it has samples in the window"""
+                groups = {}
+                for node, worker, samples, keys, seconds, recent_keys, recent_seconds, _, _, last_bucket in buckets:
+                    group = groups.setdefault(name_of(node, worker), [0, 0, 0.0, 0, 0.0, last_bucket])
+                    group[0] += samples
+                    group[1] += keys
+                    group[2] += seconds
+                    group[3] += recent_keys
+                    group[4] += recent_seconds
+                    group[5] = max(group[5], last_bucket)
+                rows = []
+                for name, (samples, keys, seconds, recent_keys, recent_seconds, last_bucket) in groups.items():
+                    rows.append({
+                        'name': name,
+                        'samples': samples,
+                        'keys': keys,
+                        'seconds': round(seconds, 3),
+                        'average_rate': round(keys / seconds, 1) if seconds else 0.0,
+                        'recent_rate': round(recent_keys / recent_seconds, 1) if recent_seconds else 0.0,
+                        'last_seen': last_bucket.strftime('%Y-%m-%d %H:%M'),
+                        'active': recent_seconds > 0
+                    })
+                return sorted(rows, key=lambda row: (row['active'], row['recent_rate']), reverse=True)
+
+            return {
+                'max_page': max_page,
+                'covered_pages': covered_pages,
+                'covered_keys': covered_pages * limit_per_page,
+                'covered_percentage': min(100.0, covered_pages / max_page * 100) if max_page else 0.0,
+                'keys_per_second': keys_per_second,
+                'new_pages_per_second': new_pages_per_second,
+                'remaining_pages': remaining_pages,
+                'eta_seconds': eta_seconds,
+                'window_seconds': ANALYTICS_RATE_WINDOW_SECONDS,
+                'total': global_total.to_dict() if global_total else None,
+                'retention_hours': THROUGHPUT_RETENTION_HOURS,
+                'nodes': grouped(lambda node, worker: node),
+                'workers': grouped(lambda node, worker: worker)
+            }
+        except Exception as e:
+            print(f"Error building analytics summary: {e}")
+            return None
@@ -2,49 +2,142 @@
 Database service for managing visited pages and matched addresses
 """
 
-from models.database import db, VisitedPage, MatchedAddress
+from models.database import db, VisitedPage, VisitedPagePart, MatchedAddress, NearMiss, LegacyVisitedPage, SchemaMigration, ThroughputTotal
+from sqlalchemy.exc import IntegrityError
+from services.page_range import key_page
+from config import HEX_KEY_START, HEX_KEY_END
 from datetime import datetime
 import os
 
+# Marks page numbers that still use the absolute numbering from before pages counted from HEX_KEY_START
+LEGACY_PAGE_PREFIX = 'legacy:'
+RANGE_RELATIVE_PAGES_MIGRATION = 'range_relative_pages'
+
 
 class DatabaseService:
     """Service to handle database operations for tracking"""
     
     @staticmethod
-    def init_db(app):
-        """Initialize database with Flask app"""
+    def _upsert_insert():
+        """Dialect insert() supporting ON CONFLICT (SQLite, PostgreSQL), or None for other databases"""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            return insert
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+            return insert
+        return None
+    
+    @staticmethod
+    def insert_if_missing(model, **values):
+        """Insert a row unless one with the same unique key exists; return True if it was inserted
+        
+        Uses INSERT ... ON CONFLICT DO NOTHING on SQLite and PostgreSQL, so a concurrent
+        insert of the same key neither raises nor discards the rest of the transaction.
+        Other databases fall back to an insert in a savepoint.
+        """
+        insert = DatabaseService._upsert_insert()
+        if insert is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(model(**values))
+                return True
+            except IntegrityError:
+                return False
+        
+        result = db.session.execute(insert(model).values(**values).on_conflict_do_nothing())
+        return result.rowcount == 1
+    
+    @staticmethod
+    def insert_or_increment(model, key_columns, values, increments):
+        """Add `increments` to the row identified by the unique `key_columns` of `values`, creating it if needed
+        
+        One INSERT ... ON CONFLICT DO UPDATE SET col = col + n statement on SQLite and
+        PostgreSQL; other databases insert a zeroed row if missing and then update it.
+        """
+        insert = DatabaseService._upsert_insert()
+        if insert is None:
+            DatabaseService.insert_if_missing(model, **values, **{name: 0 for name in increments})
+            key = {name: values[name] for name in key_columns}
+            model.query.filter_by(**key).update(
+                {getattr(model, name): getattr(model, name) + amount for name, amount in increments.items()},
+                synchronize_session=False)
+            return
+        
+        statement = insert(model).values(**values, **increments)
+        statement = statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={name: getattr(model, name) + statement.excluded[name] for name in increments}
+        )
+        db.session.execute(statement)
+    
+    @staticmethod
+    def init_db():
+        """Create the database tables (and the data directory of a SQLite file)"""
         # Create data directory if it doesn't exist
-        # Extract path from SQLite URI (e.g., 'sqlite:///data/tracking.db' -> 'data')
-        db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', 'sqlite:///data/tracking.db')
-        if db_uri.startswith('sqlite:///'):
-            db_path = db_uri.replace('sqlite:///', '')
-            data_dir = os.path.dirname(db_path)
+        # (e.g. 'sqlite:////app/data/tracking.db' -> '/app/data')
+        if db.engine.url.get_backend_name() == 'sqlite' and db.engine.url.database:
+            data_dir = os.path.dirname(db.engine.url.database)
             if data_dir and not os.path.exists(data_dir):
                 os.makedirs(data_dir, exist_ok=True)
         
-        with app.app_context():
-            db.init_app(app)
-            db.create_all()
+        db.create_all()
     
     @staticmethod
-    def add_visited_page(page_number):
-        """Add a visited page to the database"""
+    def add_visited_page(page_number, commit=True):
+        """Add a visited page to the database
+        
+        With commit=False the page joins the caller's transaction
+        (AnalyticsService.record_throughput commits it with the coverage counter).
+        """
         try:
-            # Check if page already exists
-            existing = VisitedPage.query.filter_by(page_number=str(page_number)).first()
-            if existing:
-                return False  # Already visited
-            
-            # Add new visited page
-            visited_page = VisitedPage(page_number=str(page_number))
-            db.session.add(visited_page)
-            db.session.commit()
-            return True
+            # Add the page unless it was already visited (one statement, also safe against concurrent requests)
+            added = DatabaseService.insert_if_missing(VisitedPage, page_number=str(page_number))
+            if commit:
+                db.session.commit()
+            return added
         except Exception as e:
             print(f"Error adding visited page: {e}")
             db.session.rollback()
             return False
     
+    @staticmethod
+    def add_visited_page_part(page_number, part, parts):
+        """Record a generated part of a split page; return the parts still missing (None on error)
+        
+        An empty list means every part has been generated and the page can be recorded
+        as visited. The part rows are removed then. Like add_visited_page(commit=False),
+        the rows join the caller's transaction.
+        """
+        try:
+            DatabaseService.insert_if_missing(VisitedPagePart, page_number=str(page_number), parts=parts, part=part)
+            done = {row.part for row in db.session.query(VisitedPagePart.part)
+                    .filter_by(page_number=str(page_number), parts=parts)}
+            missing = [p for p in range(parts) if p not in done]
+            if not missing:
+                VisitedPagePart.query.filter_by(page_number=str(page_number)).delete(synchronize_session=False)
+            return missing
+        except Exception as e:
+            print(f"Error adding visited page part: {e}")
+            db.session.rollback()
+            return None
+    
+    @staticmethod
+    def get_missing_page_parts(page_number):
+        """Get (parts, missing parts) of an unfinished split of a page, or None if it has none"""
+        try:
+            rows = db.session.query(VisitedPagePart.parts, VisitedPagePart.part).filter_by(
+                page_number=str(page_number)).order_by(VisitedPagePart.id).all()
+            if not rows:
+                return None
+            parts = rows[0].parts
+            done = {row.part for row in rows if row.parts == parts}
+            return parts, [p for p in range(parts) if p not in done]
+        except Exception as e:
+            print(f"Error retrieving visited page parts: {e}")
+            return None
+    
     @staticmethod
     def get_visited_pages():
         """Get all visited pages"""
@@ -123,3 +216,100 @@ class DatabaseService:
         except Exception as e:
             print(f"Error counting matched addresses: {e}")
             return 0
+    
+    @staticmethod
+    def record_near_miss(target_address, prefix_bits, address, private_key, page_number):
+        """Store a near miss for a target if it beats the best one recorded so far"""
+        try:
+            existing = NearMiss.query.filter_by(target_address=target_address).first()
+            if existing:
+                if existing.prefix_bits >= prefix_bits:
+                    return False
+                existing.prefix_bits = prefix_bits
+                existing.address = address
+                existing.private_key = private_key
+                existing.page_number = str(page_number)
+                existing.found_at = datetime.utcnow()
+            else:
+                db.session.add(NearMiss(
+                    target_address=target_address,
+                    prefix_bits=prefix_bits,
+                    address=address,
+                    private_key=private_key,
+                    page_number=str(page_number)
+                ))
+            db.session.commit()
+            return True
+        except Exception as e:
+            print(f"Error recording near miss: {e}")
+            db.session.rollback()
+            return False
+    
+    @staticmethod
+    def get_near_misses():
+        """Get the best near miss for every target, longest prefix first"""
+        try:
+            near_misses = NearMiss.query.order_by(NearMiss.prefix_bits.desc()).all()
+            return [near_miss.to_dict() for near_miss in near_misses]
+        except Exception as e:
+            print(f"Error retrieving near misses: {e}")
+            return []
+    
+    @staticmethod
+    def migrate_range_relative_pages(limit_per_page):
+        """One-time migration of page numbers recorded before pages counted from HEX_KEY_START
+        
+        Visited pages cannot be renumbered (an old page straddles two new ones), so they
+        move to legacy_visited_pages. Matched addresses and near misses are renumbered from
+        their private key; rows whose key is outside the configured range keep their old
+        number, marked with LEGACY_PAGE_PREFIX. Returns True if the migration ran now.
+        """
+        try:
+            if SchemaMigration.query.filter_by(name=RANGE_RELATIVE_PAGES_MIGRATION).first():
+                return False
+            
+            # Claim the migration first: a concurrent instance fails on the unique name and rolls back
+            db.session.add(SchemaMigration(name=RANGE_RELATIVE_PAGES_MIGRATION))
+            db.session.flush()
+            
+            db.session.execute(db.insert(LegacyVisitedPage).from_select(
+                ['page_number', 'visited_at', 'migrated_at'],
+                db.select(VisitedPage.page_number, VisitedPage.visited_at,
+                          db.literal(datetime.utcnow(), type_=db.DateTime))
+            ))
+            moved = VisitedPage.query.delete()
+            
+            renumbered = 0
+            for row in MatchedAddress.query.all() + NearMiss.query.all():
+                row.page_number = DatabaseService._range_relative_page(row.private_key, row.page_number, limit_per_page)
+                renumbered += 1
+            
+            # The precomputed coverage counter was seeded from the moved rows
+            ThroughputTotal.query.filter_by(scope='global').update({'visited_pages': 0})
+            
+            db.session.commit()
+            if moved or renumbered:
+                print(f"✓ Range-relative page numbers: moved {moved} visited pages to legacy_visited_pages, "
+                      f"renumbered {renumbered} matches and near misses")
+            return True
+        except IntegrityError:
+            # Another instance claimed the migration first
+            db.session.rollback()
+            return False
+        except Exception as e:
+            print(f"Error migrating page numbers: {e}")
+            db.session.rollback()
+            return False
+    
+    @staticmethod
+    def _range_relative_page(private_key, old_page_number, limit_per_page):
+        """Range-relative page of a recorded private key, or the marked old number if it is not in the range"""
+        try:
+            key_id = int(private_key, 16)
+        except (ValueError, TypeError):
+            key_id = None
+        if key_id is not None and HEX_KEY_START <= key_id <= HEX_KEY_END:
+            return str(key_page(key_id, limit_per_page))
+        if str(old_page_number).startswith(LEGACY_PAGE_PREFIX):
+            return old_page_number
+        return f"{LEGACY_PAGE_PREFIX}{old_page_number}"
@@ -0,0 +1,100 @@
+"""
+Multi-process key generation pipeline
+
+The per-key work of AllKeyService (point multiplication, SHA256/RIPEMD160,
+base58 address and WIF) is pure Python or hashes of 33-byte inputs, so it
+holds the GIL and threads cannot overlap it. KeyPipeline splits a key run
+into batches and keeps at most `queue_size` of them in flight on a
+ProcessPoolExecutor. Each worker process derives the hash160s, addresses
+and WIFs of a whole batch; the calling thread assembles the AllKey rows in
+key order as batches complete, and matching stays with the caller.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from models.all_key import AllKey
+
+# One AllKeyService per worker process and engine, created by its first batch
+_worker_services = {}
+
+
+def derive_batch(engine: str, low: int, high: int):
+    """Worker: (hash160s, addresses, WIFs) of keys `low` to `high`, in key order"""
+    service = _worker_services.get(engine)
+    if service is None:
+        from services.all_key_service import AllKeyService
+        service = AllKeyService(engine=engine, pipeline_workers=0)
+        _worker_services[engine] = service
+
+    items = service.get_range(low, high - low + 1)
+    return ([item.hash160 for item in items],
+            [item.address_compressed for item in items],
+            [item.private_key for item in items])
+
+
+class KeyPipeline:
+    """Bounded queue of key batches consumed by a process pool"""
+
+    def __init__(self, engine: str, workers: int, batch_size: int, queue_size: int):
+        self.engine = engine
+        self.workers = workers
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self.executor = None
+        self.disabled = False
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        """Start the worker pool on first use"""
+        with self._lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self.executor
+
+    def get_range(self, low: int, high: int):
+        """AllKey rows for keys `low` to `high` (already clipped to the range), or None to use the serial path
+
+        None is returned when the pool cannot run here (e.g. no /dev/shm for its
+        semaphores on some serverless platforms); the pipeline then stays off for
+        the rest of the process.
+        """
+        if self.disabled:
+            return None
+
+        batches = ((first, min(first + self.batch_size - 1, high))
+                   for first in range(low, high + 1, self.batch_size))
+        pending = deque()
+        items = []
+        try:
+            executor = self._get_executor()
+            for batch in batches:
+                if len(pending) == self.queue_size:
+                    self._collect(pending.popleft(), items)
+                pending.append((batch, executor.submit(derive_batch, self.engine, *batch)))
+            while pending:
+                self._collect(pending.popleft(), items)
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            print(f"⚠ Key pipeline unavailable, generating keys in the request thread: {type(e).__name__}: {e}")
+            for _, future in pending:
+                future.cancel()
+            self.disabled = True
+            return None
+
+        return items
+
+    @staticmethod
+    def _collect(entry, items):
+        """Wait for one batch and append its AllKey rows"""
+        (low, high), future = entry
+        hash160s, addresses, private_keys = future.result()
+        for index, key_id in enumerate(range(low, high + 1)):
+            id_hex = hex(key_id)[2:].zfill(64)
+            items.append(AllKey(
+                id=id_hex,
+                private_key=private_keys[index],
+                hex_private_key=id_hex,
+                address_compressed=addresses[index],
+                hash160=hash160s[index]
+            ))
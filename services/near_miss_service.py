@@ -0,0 +1,94 @@
+import threading
+from typing import Dict, List, Tuple
+from models.all_key import AllKey
+from services.database_service import DatabaseService
+
+HASH160_BITS = 160
+
+
+def common_prefix_bits(a: bytes, b: bytes) -> int:
+    """Number of leading bits two equal-length hashes have in common"""
+    diff = int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')
+    return len(a) * 8 - diff.bit_length()
+
+
+class NearMissService:
+    """Service for finding generated keys whose hash160 shares a long prefix with a watchlist target
+
+    In sorted order, the generated hash with the longest common prefix with a
+    target is always its immediate predecessor or successor, so one merge pass
+    over the sorted page hashes and the sorted watchlist finds the best
+    candidate for every target.
+    """
+
+    def __init__(self, watchlist_service, min_bits: int):
+        self.watchlist_service = watchlist_service
+        self.min_bits = min_bits
+
+        # Best prefix length recorded per target, loaded from the database on first use
+        self._best = None
+        self._lock = threading.Lock()
+
+    def find_best(self, items: List[AllKey]) -> Dict[str, Tuple[int, AllKey]]:
+        """Return target address -> (prefix bits, item) for the closest generated key to each target"""
+        targets = self.watchlist_service.get_hash160_index()
+        generated = sorted((item for item in items if item.hash160), key=lambda item: item.hash160)
+        if not targets or not generated:
+            return {}
+
+        best = {}
+        previous = None   # Last generated item before the current position
+        pending = []      # Targets seen since `previous`, waiting for the next generated item
+        g = 0
+        for target_hash, target_address in targets:
+            # Advance through generated hashes below this target; each one closes the pending targets
+            while g < len(generated) and generated[g].hash160 < target_hash:
+                for pending_hash, pending_address in pending:
+                    self._consider(best, pending_address, pending_hash, generated[g])
+                pending = []
+                previous = generated[g]
+                g += 1
+            if previous is not None:
+                self._consider(best, target_address, target_hash, previous)
+            pending.append((target_hash, target_address))
+
+        # Targets after the last smaller hash are compared with their successor, if any
+        if g < len(generated):
+            for pending_hash, pending_address in pending:
+                self._consider(best, pending_address, pending_hash, generated[g])
+
+        return best
+
+    @staticmethod
+    def _consider(best, target_address, target_hash, item):
+        bits = common_prefix_bits(target_hash, item.hash160)
+        if target_address not in best or bits > best[target_address][0]:
+            best[target_address] = (bits, item)
+
+    def record(self, items: List[AllKey], page_of_item) -> List[Tuple[str, int]]:
+        """Find near misses on a page and store the ones that beat the recorded best
+
+        Exact matches (160 bits) are left to the watchlist match path.
+        Returns the (target address, prefix bits) pairs that were improved.
+        """
+        found = self.find_best(items)
+        if not found:
+            return []
+
+        with self._lock:
+            if self._best is None:
+                self._best = {near_miss['target_address']: near_miss['prefix_bits']
+                              for near_miss in DatabaseService.get_near_misses()}
+            best = self._best
+
+        improved = []
+        for target_address, (bits, item) in found.items():
+            if bits < self.min_bits or bits >= HASH160_BITS or bits <= best.get(target_address, -1):
+                continue
+            if DatabaseService.record_near_miss(target_address, bits, item.address_compressed,
+                                                item.hex_private_key, page_of_item(item)):
+                improved.append((target_address, bits))
+            with self._lock:
+                best[target_address] = max(bits, best.get(target_address, -1))
+
+        return improved
@@ -0,0 +1,212 @@
+"""
+Vectorized secp256k1 public key generation with NumPy multi-limb field arithmetic
+
+Field elements are stored as arrays of 16 little-endian 16-bit limbs held in
+int64, one row per element, so a whole page of keys is processed with a few
+hundred array operations instead of one Python big-int computation per key.
+Products of two limbs fit in 32 bits and a full 16x16 column sum fits in 36
+bits, which leaves plenty of headroom for the lazy reductions below.
+
+Consecutive keys k0, k0+1, ... are generated by doubling: starting from
+[k0*G], each round adds m*G to the m points generated so far, so log2(n)
+rounds of batched affine additions cover the page. Each round needs one
+inversion per point, done with a product tree (Montgomery's trick) so only a
+single modular inversion is computed with Python integers.
+
+NumPy is optional: when it is not installed `is_available()` returns False
+and AllKeyService keeps using the ecdsa backend.
+
+scripts/check_key_engines.py compares this module with python-ecdsa; run it
+after changing the limb arithmetic.
+"""
+
+from ecdsa import SECP256k1
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+LIMBS = 16
+LIMB_BITS = 16
+LIMB_MASK = (1 << LIMB_BITS) - 1
+
+FIELD_P = SECP256k1.curve.p()
+# p = 2**256 - FIELD_C, so 2**256 is congruent to FIELD_C = 2**32 + 977 (limb 2 and 977 in limb 0)
+FIELD_C_LOW = 977
+
+
+def is_available() -> bool:
+    """Check if the NumPy backend can be used"""
+    return np is not None
+
+
+def _to_limbs(value: int):
+    """Convert a Python integer below 2**256 to a (16,) limb array"""
+    return np.array([(value >> (LIMB_BITS * k)) & LIMB_MASK for k in range(LIMBS)], dtype=np.int64)
+
+
+def _from_limbs(limbs) -> int:
+    """Convert a (16,) limb array back to a Python integer"""
+    return sum(int(limb) << (LIMB_BITS * k) for k, limb in enumerate(limbs))
+
+
+_P_LIMBS = None
+_TWO_P_LIMBS = None
+
+
+def _field_constants():
+    """Limb forms of p and 2p (built lazily so importing this module never requires NumPy)"""
+    global _P_LIMBS, _TWO_P_LIMBS
+    if _P_LIMBS is None:
+        _P_LIMBS = _to_limbs(FIELD_P)
+        # 2p does not fit in 256 bits, so it gets one extra limb
+        _TWO_P_LIMBS = np.array([((2 * FIELD_P) >> (LIMB_BITS * k)) & LIMB_MASK for k in range(LIMBS + 1)],
+                                dtype=np.int64)
+    return _P_LIMBS, _TWO_P_LIMBS
+
+
+def _carry(r):
+    """Propagate carries through the columns of r in place, appending one column for the final carry"""
+    r = np.concatenate([r, np.zeros((r.shape[0], 1), dtype=np.int64)], axis=1)
+    for k in range(r.shape[1] - 1):
+        # Arithmetic shift floors negative columns, so borrows propagate as well
+        r[:, k + 1] += r[:, k] >> LIMB_BITS
+        r[:, k] &= LIMB_MASK
+    return r
+
+
+def _reduce(r):
+    """Reduce a non-negative (n, L) column array to 16 limbs holding a value below 2**256
+
+    The result is congruent to the input modulo p but is not necessarily below p.
+    """
+    while True:
+        r = _carry(r)
+        if r.shape[1] <= LIMBS:
+            return r
+        # Everything at or above limb 16 is a multiple of 2**256 and folds back in as top * (2**32 + 977)
+        top = np.zeros(r.shape[0], dtype=np.int64)
+        for k in range(r.shape[1] - 1, LIMBS - 1, -1):
+            top = (top << LIMB_BITS) | r[:, k]
+        if not top.any():
+            return r[:, :LIMBS]
+        r = r[:, :LIMBS].copy()
+        r[:, 0] += top * FIELD_C_LOW
+        r[:, 2] += top
+
+
+def _mul(a, b):
+    """Multiply two (n, 16) limb arrays modulo p"""
+    n = a.shape[0]
+    cols = np.zeros((n, 2 * LIMBS - 1), dtype=np.int64)
+    for i in range(LIMBS):
+        cols[:, i:i + LIMBS] += a[:, i:i + 1] * b
+
+    # Fold the high half once before carrying: H * 2**256 == H * 977 + H * 2**32 (mod p)
+    high = cols[:, LIMBS:]
+    r = np.zeros((n, LIMBS + 3), dtype=np.int64)
+    r[:, :LIMBS] = cols[:, :LIMBS]
+    r[:, :LIMBS - 1] += high * FIELD_C_LOW
+    r[:, 2:LIMBS + 1] += high
+    return _reduce(r)
+
+
+def _sub(a, b):
+    """Subtract two (n, 16) limb arrays modulo p"""
+    _, two_p = _field_constants()
+    # b < 2**256 < 2p, so a + 2p - b is always non-negative
+    r = np.zeros((a.shape[0], LIMBS + 1), dtype=np.int64)
+    r[:, :LIMBS] = a - b
+    r += two_p
+    return _reduce(r)
+
+
+def _canonical(a):
+    """Fully reduce a (n, 16) limb array to values below p"""
+    p_limbs, _ = _field_constants()
+    d = _carry(a - p_limbs)
+    # A non-negative final carry means a >= p, in which case a - p is the canonical value
+    ge_p = d[:, LIMBS] >= 0
+    return np.where(ge_p[:, None], d[:, :LIMBS], a)
+
+
+def _batch_inverse(a):
+    """Invert every element of a (n, 16) limb array modulo p with a product tree"""
+    n = a.shape[0]
+    size = 1
+    while size < n:
+        size *= 2
+    level = np.zeros((size, LIMBS), dtype=np.int64)
+    level[:n] = a
+    level[n:, 0] = 1
+
+    # Up: pairwise products until one element remains
+    levels = [level]
+    while level.shape[0] > 1:
+        level = _mul(level[0::2], level[1::2])
+        levels.append(level)
+
+    total = _from_limbs(_canonical(level)[0])
+    if total == 0:
+        raise ZeroDivisionError("batch inverse of zero")
+    inverse = _to_limbs(pow(total, -1, FIELD_P))[None, :]
+
+    # Down: the inverse of each child is the parent inverse times its sibling
+    for level in reversed(levels[:-1]):
+        children = np.empty_like(level)
+        children[0::2] = _mul(inverse, level[1::2])
+        children[1::2] = _mul(inverse, level[0::2])
+        inverse = children
+    return inverse[:n]
+
+
+def _add_fixed_point(x1, y1, x2: int, y2: int):
+    """Add the affine point (x2, y2) to every point of a batch of affine points"""
+    n = x1.shape[0]
+    qx = np.broadcast_to(_to_limbs(x2), (n, LIMBS))
+    qy = np.broadcast_to(_to_limbs(y2), (n, LIMBS))
+
+    dx = _sub(qx, x1)
+    if not _canonical(dx).any(axis=1).all():
+        # P == Q or P == -Q needs a doubling or yields infinity; only happens for tiny keys
+        raise ArithmeticError("degenerate point addition")
+    lam = _mul(_sub(qy, y1), _batch_inverse(dx))
+    x3 = _sub(_sub(_mul(lam, lam), x1), qx)
+    y3 = _sub(_mul(lam, _sub(x1, x3)), y1)
+    return x3, y3
+
+
+def compressed_public_keys(first_key: int, count: int):
+    """Generate compressed public keys for `count` consecutive private keys starting at `first_key`
+
+    Returns a (count, 33) uint8 array, one serialized public key per row.
+    Raises ArithmeticError for ranges that hit a degenerate addition (keys
+    close to 0 or to the group order); callers fall back to the serial path.
+    """
+    if count <= 0:
+        return np.zeros((0, 33), dtype=np.uint8)
+
+    generator = SECP256k1.generator
+    start = generator * first_key
+    xs = _to_limbs(start.x())[None, :]
+    ys = _to_limbs(start.y())[None, :]
+
+    # Doubling: points [k0 .. k0+m-1] plus m*G gives [k0+m .. k0+2m-1]
+    m = 1
+    while m < count:
+        step = generator * m
+        take = min(m, count - m)
+        new_x, new_y = _add_fixed_point(xs[:take], ys[:take], step.x(), step.y())
+        xs = np.concatenate([xs, new_x])
+        ys = np.concatenate([ys, new_y])
+        m *= 2
+
+    xs = _canonical(xs)
+    ys = _canonical(ys)
+
+    out = np.empty((count, 33), dtype=np.uint8)
+    out[:, 0] = 2 + (ys[:, 0] & 1)
+    # Big-endian x coordinate: most significant limb first, each limb big-endian
+    out[:, 1:] = xs[:, ::-1].astype('>u2').view(np.uint8).reshape(count, 32)
+    return out
@@ -0,0 +1,29 @@
+"""
+Page numbering within the configured key range
+
+Pages are numbered from the start of the configured range: page 1 starts at
+HEX_KEY_START. These helpers only need the range constants, so routes that
+just do page arithmetic (e.g. /random) never import the key generation stack.
+"""
+
+from config import HEX_KEY_START, HEX_KEY_END
+
+def page_first_key(page: int, limit_per_page: int) -> int:
+    """Return the key ID of the first key on a page"""
+    return HEX_KEY_START + (page - 1) * limit_per_page
+
+def key_page(key_id: int, limit_per_page: int) -> int:
+    """Return the page number that contains a key ID"""
+    return (key_id - HEX_KEY_START) // limit_per_page + 1
+
+def range_max_page(limit_per_page: int) -> int:
+    """Return the number of pages covering the configured range"""
+    return -(-(HEX_KEY_END - HEX_KEY_START + 1) // limit_per_page)  # ceil division
+
+def clip_to_range(first_key_id: int, count: int):
+    """Return the (low, high) key IDs of a run of consecutive keys that fall in the configured range, or None"""
+    low = max(first_key_id, HEX_KEY_START)
+    high = min(first_key_id + count - 1, HEX_KEY_END)
+    if low > high:
+        return None
+    return low, high
@@ -0,0 +1,213 @@
+"""
+Background address search jobs
+
+A search is submitted as a job and its progress is committed to the database
+after every slice of pages. Work on a job is claimed with a conditional
+UPDATE on its status and updated_at, so no two workers (threads, processes
+or serverless instances) ever search the same slice.
+
+A job advances in two ways. On a long-running server a worker thread pool
+runs it slice after slice. On serverless instances background threads are
+frozen once the response is sent, so a status request that finds a job
+without a live owner claims it and runs one bounded slice itself: a wide
+search window finishes across many short polling requests.
+"""
+
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from models.database import db, SearchJob
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class SearchJobService:
+    """Service to submit, run, report on and cancel background address searches"""
+
+    def __init__(self, app, all_key_service, limit_per_page, max_workers, slice_pages, request_slice_pages,
+                 stale_seconds):
+        self.app = app
+        self.all_key_service = all_key_service
+        self.limit_per_page = limit_per_page
+        self.slice_pages = max(1, slice_pages)
+        self.request_slice_pages = max(1, request_slice_pages)
+        self.stale_after = timedelta(seconds=stale_seconds)
+        # Without workers (serverless) jobs only advance in status requests
+        self.executor = None
+        if max_workers > 0:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search-job')
+
+        # Jobs currently owned by a worker of this process
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def submit(self, address, start_page, pages):
+        """Create a search job and queue it, returning the job id (None if it could not be created)"""
+        try:
+            job = SearchJob(
+                id=uuid.uuid4().hex,
+                address=address,
+                start_page=str(start_page),
+                end_page=str(start_page + pages - 1),
+                next_page=str(start_page),
+                status='queued'
+            )
+            db.session.add(job)
+            db.session.commit()
+        except Exception as e:
+            print(f"Error creating search job: {e}")
+            db.session.rollback()
+            return None
+
+        self._schedule(job.id)
+        return job.id
+
+    def get_job(self, job_id):
+        """Get a job as a dictionary, first running one slice of it if it has no live owner"""
+        try:
+            job = db.session.get(SearchJob, job_id)
+            if job is None:
+                return None
+
+            if job.status in ACTIVE_STATUSES and job.id not in self._running and self._is_unowned(job):
+                lease = self._claim(job.id, job.status, job.updated_at)
+                if lease is not None:
+                    try:
+                        self._run_slice(job.id, lease, self.request_slice_pages, release=True)
+                    except Exception as e:
+                        print(f"Error running search job {job_id}: {e}")
+                        self._fail(job_id, e)
+                    job = db.session.get(SearchJob, job_id)
+
+            return job.to_dict()
+        except Exception as e:
+            print(f"Error retrieving search job: {e}")
+            db.session.rollback()
+            return None
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; a worker stops after its current slice"""
+        try:
+            job = db.session.get(SearchJob, job_id)
+            if job is None or job.status not in ACTIVE_STATUSES:
+                return False
+
+            job.status = 'cancelled'
+            job.updated_at = datetime.utcnow()
+            db.session.commit()
+            return True
+        except Exception as e:
+            print(f"Error cancelling search job: {e}")
+            db.session.rollback()
+            return False
+
+    def _is_unowned(self, job):
+        """A queued job has no owner; a running one has lost it when nobody has advanced it recently"""
+        return job.status == 'queued' or datetime.utcnow() - job.updated_at > self.stale_after
+
+    def _claim(self, job_id, status, updated_at):
+        """Take a job over if it is still in the state it was read in; return the lease time, or None
+
+        The conditional UPDATE succeeds for exactly one of several concurrent
+        claimants. The lease time is the job's new updated_at, which the owner
+        checks again when it saves the slice.
+        """
+        lease = datetime.utcnow()
+        claimed = SearchJob.query.filter(
+            SearchJob.id == job_id,
+            SearchJob.status == status,
+            SearchJob.updated_at == updated_at
+        ).update({SearchJob.status: 'running', SearchJob.updated_at: lease}, synchronize_session=False)
+        db.session.commit()
+        return lease if claimed == 1 else None
+
+    def _schedule(self, job_id):
+        """Hand a job to the worker pool unless this process is already running it"""
+        if self.executor is None:
+            return
+        with self._lock:
+            if job_id in self._running:
+                return
+            self._running.add(job_id)
+        self.executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        """Worker: claim the job and search it slice by slice while it stays ours"""
+        try:
+            with self.app.app_context():
+                job = db.session.get(SearchJob, job_id)
+                lease = None
+                if job is not None and job.status in ACTIVE_STATUSES and self._is_unowned(job):
+                    lease = self._claim(job_id, job.status, job.updated_at)
+                while lease is not None:
+                    lease = self._run_slice(job_id, lease, self.slice_pages, release=False)
+        except Exception as e:
+            print(f"Error running search job {job_id}: {e}")
+            with self.app.app_context():
+                self._fail(job_id, e)
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+
+    def _run_slice(self, job_id, lease, pages, release):
+        """Search the next `pages` pages of a job claimed at `lease`
+
+        The progress is saved only if the job still carries this lease, i.e. it was
+        neither cancelled nor taken over meanwhile. With release=True the job is
+        handed back as 'queued' for the next status request. Returns the new lease
+        while the job is still ours and has more work, otherwise None.
+        """
+        job = db.session.get(SearchJob, job_id)
+        page = int(job.next_page)
+        end_page = int(job.end_page)
+        slice_end = min(page + pages - 1, end_page)
+
+        status = 'running'
+        result = {}
+        while page <= slice_end and status == 'running':
+            items = self.all_key_service.get_data(page, self.limit_per_page)
+            for i, item in enumerate(items):
+                if item.address_compressed == job.address:
+                    status = 'found'
+                    result = {
+                        SearchJob.result_page: str(page),
+                        SearchJob.result_position: i + 1,
+                        SearchJob.result_private_key: item.private_key
+                    }
+                    break
+            page += 1
+
+        if status == 'running':
+            if page > end_page:
+                status = 'not_found'
+            elif release:
+                status = 'queued'
+        now = datetime.utcnow()
+        values = {SearchJob.next_page: str(page), SearchJob.status: status, SearchJob.updated_at: now, **result}
+
+        saved = SearchJob.query.filter(
+            SearchJob.id == job_id,
+            SearchJob.status == 'running',
+            SearchJob.updated_at == lease
+        ).update(values, synchronize_session=False)
+        if not saved and status == 'found':
+            # A result is kept even if the job was cancelled while this slice ran
+            SearchJob.query.filter_by(id=job_id, status='cancelled').update(values, synchronize_session=False)
+        db.session.commit()
+
+        return now if saved and status == 'running' else None
+
+    def _fail(self, job_id, error):
+        """Mark a job as failed"""
+        try:
+            db.session.rollback()
+            job = db.session.get(SearchJob, job_id)
+            if job is not None:
+                job.status = 'failed'
+                job.error = f"{type(error).__name__}: {str(error)[:200]}"
+                job.updated_at = datetime.utcnow()
+                db.session.commit()
+        except Exception as e:
+            print(f"Error marking search job as failed: {e}")
+            db.session.rollback()
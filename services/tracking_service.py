@@ -1,66 +1,235 @@
 import os
+import time
+import atexit
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from config import TRACKING_GROUP_COMMIT_SIZE, TRACKING_GROUP_COMMIT_SECONDS, TRACKING_COMPACT_EVERY
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no inter-process lock, so only one process may use the data directory
+    fcntl = None
+
+# Visited pages are stored as fixed-width big-endian unsigned integers (256 bits covers every page number)
+PAGE_RECORD_SIZE = 32
 
 class TrackingService:
-    """Service for tracking visited pages and matched watchlist addresses"""
-    
-    def __init__(self):
+    """Service for tracking visited pages and matched watchlist addresses
+
+    Visited pages are kept in an append-only binary log of fixed-width page
+    numbers with an in-memory index loaded once, so checking and recording a
+    page are O(1). Appends are fsynced in groups and the log is compacted
+    periodically.
+
+    Several processes may share the log: appends, flushes and compaction hold
+    an exclusive flock on visited_pages.lock, and a writer whose log was
+    replaced by another process's compaction reloads it before appending.
+    """
+
+    def __init__(self, group_commit_size: int = TRACKING_GROUP_COMMIT_SIZE,
+                 group_commit_seconds: float = TRACKING_GROUP_COMMIT_SECONDS,
+                 compact_every: int = TRACKING_COMPACT_EVERY):
         # Create data directory if it doesn't exist
         self.data_dir = Path('data')
         self.data_dir.mkdir(exist_ok=True)
-        
+
+        self.visited_pages_log = self.data_dir / 'visited_pages.log'
+        self.visited_pages_lock = self.data_dir / 'visited_pages.lock'
+        # The legacy visited_pages.txt uses the absolute page numbering from before pages counted
+        # from HEX_KEY_START, so it is left in place and not imported into the log
         self.visited_pages_file = self.data_dir / 'visited_pages.txt'
         self.matched_addresses_file = self.data_dir / 'matched_addresses.txt'
-    
-    def add_visited_page(self, page_number):
-        """Add a page number to the visited pages file"""
+
+        self.group_commit_size = max(1, group_commit_size)
+        self.group_commit_seconds = group_commit_seconds
+        self.compact_every = compact_every
+
+        self._lock = threading.Lock()
+        self._index = None          # Ordered set (dict keys) of visited pages, loaded on first use
+        self._log = None            # Open append handle
+        self._lock_file = None      # Open handle of the inter-process lock file
+        self._records = 0           # Records in the log, including duplicates written by other processes
+        self._pending = 0           # Appends not yet fsynced
+        self._last_sync = time.monotonic()
+        self._appends_since_compact = 0
+
+        atexit.register(self.flush)
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold the inter-process lock on the log (called with the thread lock held)"""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_file is None:
+            self._lock_file = open(self.visited_pages_lock, 'ab')
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
         try:
-            # Check if page is already visited
-            if self.is_page_visited(page_number):
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _reload_if_replaced(self):
+        """Reload the index if another process replaced (compacted or cleared) the log (called with both locks held)"""
+        try:
+            current = os.stat(self.visited_pages_log)
+            opened = os.fstat(self._log.fileno())
+            if (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
                 return
-            
-            with open(self.visited_pages_file, 'a') as f:
-                f.write(f"{page_number}\n")
+        except FileNotFoundError:
+            pass
+        self._log.close()
+        self._index = None
+        self._pending = 0
+        self._load_index()
+
+    def _load_index(self):
+        """Load the visited page index from the log (called with both locks held)"""
+        if self._index is not None:
+            return
+
+        self._index = {}
+        if self.visited_pages_log.exists():
+            data = self.visited_pages_log.read_bytes()
+            # Drop a torn record left by an interrupted write
+            usable = len(data) - len(data) % PAGE_RECORD_SIZE
+            if usable != len(data):
+                with open(self.visited_pages_log, 'r+b') as f:
+                    f.truncate(usable)
+            for pos in range(0, usable, PAGE_RECORD_SIZE):
+                self._index[int.from_bytes(data[pos:pos + PAGE_RECORD_SIZE], 'big')] = None
+            self._records = usable // PAGE_RECORD_SIZE
+
+        self._log = open(self.visited_pages_log, 'ab')
+
+    def _write_log(self, pages):
+        """Atomically replace the log with the given pages"""
+        tmp_path = self.visited_pages_log.with_suffix('.log.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(page.to_bytes(PAGE_RECORD_SIZE, 'big') for page in pages))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.visited_pages_log)
+
+    def _sync(self):
+        """Fsync pending appends (called with both locks held)"""
+        if self._log is None or self._pending == 0:
+            return
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _compact(self):
+        """Rewrite the log without duplicate records (called with both locks held)"""
+        self._sync()
+        self._log.close()
+
+        # Re-read the log so pages appended by other processes are kept. Their appends are
+        # flushed under the file lock, so all of them are in the file at this point.
+        self._index = None
+        self._load_index()
+        self._log.close()
+
+        if self._records > len(self._index):
+            self._write_log(self._index)
+            self._records = len(self._index)
+
+        self._log = open(self.visited_pages_log, 'ab')
+        self._appends_since_compact = 0
+
+    def add_visited_page(self, page_number):
+        """Add a page number to the visited pages log"""
+        try:
+            page_number = int(page_number)
+            if page_number < 0 or page_number.bit_length() > PAGE_RECORD_SIZE * 8:
+                raise ValueError(f"page number out of range: {page_number}")
+
+            with self._lock, self._file_lock():
+                self._load_index()
+                self._reload_if_replaced()
+
+                # Check if page is already visited
+                if page_number in self._index:
+                    return
+
+                # Hand the record to the OS before releasing the file lock, so a compaction
+                # in another process never misses it
+                self._log.write(page_number.to_bytes(PAGE_RECORD_SIZE, 'big'))
+                self._log.flush()
+                self._index[page_number] = None
+                self._records += 1
+                self._pending += 1
+                self._appends_since_compact += 1
+
+                # Group commit: fsync once per batch of appends or once per interval
+                if (self._pending >= self.group_commit_size or
+                        time.monotonic() - self._last_sync >= self.group_commit_seconds):
+                    self._sync()
+
+                if self.compact_every and self._appends_since_compact >= self.compact_every:
+                    self._compact()
         except Exception as e:
             print(f"Error adding visited page: {e}")
-    
+
+    def flush(self):
+        """Force pending visited page appends to disk"""
+        try:
+            with self._lock, self._file_lock():
+                self._sync()
+        except Exception as e:
+            print(f"Error flushing visited pages: {e}")
+
     def is_page_visited(self, page_number):
         """Check if a page has been visited"""
         try:
-            if not self.visited_pages_file.exists():
-                return False
-            
-            with open(self.visited_pages_file, 'r') as f:
-                visited_pages = f.read().strip().split('\n')
-                return str(page_number) in visited_pages
+            with self._lock, self._file_lock():
+                self._load_index()
+                return int(page_number) in self._index
         except Exception as e:
             print(f"Error checking visited page: {e}")
             return False
-    
+
     def get_visited_pages(self):
         """Get all visited pages"""
         try:
-            if not self.visited_pages_file.exists():
-                return []
-            
-            with open(self.visited_pages_file, 'r') as f:
-                content = f.read().strip()
-                if content:
-                    return [int(page) for page in content.split('\n') if page.strip()]
-            return []
+            with self._lock, self._file_lock():
+                self._load_index()
+                return list(self._index)
         except Exception as e:
             print(f"Error getting visited pages: {e}")
             return []
-    
+
+    def count_visited_pages(self):
+        """Get count of visited pages"""
+        try:
+            with self._lock, self._file_lock():
+                self._load_index()
+                return len(self._index)
+        except Exception as e:
+            print(f"Error counting visited pages: {e}")
+            return 0
+
     def clear_visited_pages(self):
         """Clear all visited pages"""
         try:
-            if self.visited_pages_file.exists():
-                self.visited_pages_file.unlink()
+            with self._lock, self._file_lock():
+                if self._log is not None:
+                    self._log.close()
+                    self._log = None
+                self._index = None
+                self._records = 0
+                self._pending = 0
+                self._appends_since_compact = 0
+                # The legacy visited_pages.txt is left in place (see __init__)
+                if self.visited_pages_log.exists():
+                    self.visited_pages_log.unlink()
         except Exception as e:
             print(f"Error clearing visited pages: {e}")
-    
+
     def add_matched_address(self, address, page_number, private_key):
         """Add a matched watchlist address to the file"""
         try:
@@ -69,20 +238,20 @@ class TrackingService:
                 f.write(f"{timestamp} | Page: {page_number} | Address: {address} | PrivateKey: {private_key}\n")
         except Exception as e:
             print(f"Error adding matched address: {e}")
-    
+
     def get_matched_addresses(self):
         """Get all matched addresses"""
         try:
             if not self.matched_addresses_file.exists():
                 return []
-            
+
             with open(self.matched_addresses_file, 'r') as f:
                 lines = f.read().strip().split('\n')
                 return [line for line in lines if line.strip()]
         except Exception as e:
             print(f"Error getting matched addresses: {e}")
             return []
-    
+
     def clear_matched_addresses(self):
         """Clear all matched addresses"""
         try:
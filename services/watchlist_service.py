@@ -1,5 +1,6 @@
 import os
-from typing import Set, Dict, List
+import base58
+from typing import Set, Dict, List, Tuple
 
 class WatchlistService:
     """Service for managing Bitcoin address watchlist"""
@@ -7,11 +8,15 @@ class WatchlistService:
     def __init__(self, watchlist_file: str = 'watchlist.txt'):
         self.watchlist_file = watchlist_file
         self.watchlist: Set[str] = set()
+        self.original_addresses: Dict[str, str] = {}  # lowercase -> address as entered (base58 is case-sensitive)
+        self._hash160_index = None
         self.load_watchlist()
     
     def load_watchlist(self) -> None:
         """Load addresses from watchlist file"""
         self.watchlist = set()
+        self.original_addresses = {}
+        self._hash160_index = None
         
         if not os.path.exists(self.watchlist_file):
             return
@@ -23,18 +28,22 @@ class WatchlistService:
                     # Skip empty lines and comments
                     if line and not line.startswith('#'):
                         self.watchlist.add(line.lower())
+                        self.original_addresses[line.lower()] = line
         except Exception as e:
             print(f"Error loading watchlist: {e}")
     
     def get_watchlist(self) -> Set[str]:
         """Get current watchlist"""
-        return self.watchlist.copy()
+        return set(self.original_addresses.values())
     
     def add_address(self, address: str) -> bool:
         """Add an address to the watchlist"""
-        address = address.strip().lower()
+        original = address.strip()
+        address = original.lower()
         if address and len(address) > 10:  # Basic validation
             self.watchlist.add(address)
+            self.original_addresses[address] = original
+            self._hash160_index = None
             self.save_watchlist()
             return True
         return False
@@ -44,6 +53,8 @@ class WatchlistService:
         address = address.strip().lower()
         if address in self.watchlist:
             self.watchlist.remove(address)
+            self.original_addresses.pop(address, None)
+            self._hash160_index = None
             self.save_watchlist()
             return True
         return False
@@ -56,7 +67,7 @@ class WatchlistService:
                 f.write("# Add one Bitcoin address per line\n")
                 f.write("# Lines starting with # are comments\n\n")
                 for address in sorted(self.watchlist):
-                    f.write(f"{address}\n")
+                    f.write(f"{self.original_addresses.get(address, address)}\n")
         except Exception as e:
             print(f"Error saving watchlist: {e}")
     
@@ -78,6 +89,25 @@ class WatchlistService:
         
         return matches
     
+    def get_hash160_index(self) -> List[Tuple[bytes, str]]:
+        """Get (hash160, address) pairs of watched P2PKH addresses, sorted by hash160
+        
+        Addresses that are not valid base58check P2PKH addresses (including
+        ones stored lowercased by older versions) are skipped.
+        """
+        if self._hash160_index is None:
+            index = []
+            for address in self.original_addresses.values():
+                try:
+                    payload = base58.b58decode_check(address)
+                except ValueError:
+                    continue
+                if len(payload) == 21 and payload[0] == 0x00:
+                    index.append((payload[1:], address))
+            index.sort()
+            self._hash160_index = index
+        return self._hash160_index
+    
     def check_address_in_watchlist(self, address: str) -> bool:
         """Check if a single address is in the watchlist"""
         return address.lower() in self.watchlist